@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Benchmark type casting a long argument list, by casting strategy.
+
+- each cast: every cast's type_cast() on every argument in turn
+- fused: the parser's fused cast chain on every argument, as iter_parse()
+- bulk: parse(recurse=True), which casts unquoted runs with type_cast_many()
+- packed: as bulk, with pack_numbers=True
+
+Run with: python benchmarks/bench_casts.py
+"""
+import timeit
+
+import generators
+from prompt_smart_menu.input_parser import InputParser, KwargCast, NumberCast
+
+
+ARGS = 1000
+NUMBER = 200
+INPUTS = [('words', generators.word_args(ARGS)),
+          ('numbers', generators.number_args(ARGS)),
+          ('ints', generators.int_args(ARGS)),
+          ('kwargs', generators.kwargs_args(ARGS)),
+          ('mixed', generators.long_args(ARGS))]
+
+
+class UnfusedParser(InputParser):
+    """InputParser calling every cast's type_cast() on every argument."""
+
+    def __init__(self, *args) -> None:  # noqa: ANN002
+        super().__init__(*args)
+        casts = self._casts
+
+        def chain(item):  # noqa: ANN
+            for cast in casts:
+                item = cast.type_cast(item)
+            return item
+        self._cast_chain = chain
+
+
+def main():
+    casts = (KwargCast, NumberCast)
+    unfused = UnfusedParser(*casts)
+    parser = InputParser(*casts)
+    packer = InputParser(*casts, pack_numbers=True)
+    strategies = [
+        ('each cast', lambda s: list(unfused.iter_parse(s))),
+        ('fused', lambda s: list(parser.iter_parse(s))),
+        ('bulk', lambda s: parser.parse(s, recurse=True)),
+        ('packed', lambda s: packer.parse(s, recurse=True)),
+    ]
+    print(f'{"usec":>8} ' + ' '.join(f'{name:>10}'
+                                     for name, _ in strategies))
+    for name, input_string in INPUTS:
+        times = [min(timeit.repeat(lambda: parse(input_string),
+                                   number=NUMBER, repeat=5)) / NUMBER * 1e6
+                 for _, parse in strategies]
+        print(f'{name:>8} ' + ' '.join(f'{t:>10.1f}' for t in times))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Benchmark run() on deep menus, walking the tree vs a compiled table.
+
+Run with: python benchmarks/bench_compile.py
+"""
+import timeit
+
+from prompt_smart_menu import PromptSmartMenu
+from prompt_smart_menu.input_parser import InputParser, KwargCast, NumberCast
+
+
+DEPTHS = [2, 5, 10, 15]
+NUMBER = 20000
+
+
+def endpoint(*args, **kwargs):
+    pass
+
+
+def build_menu(depth: int) -> PromptSmartMenu:
+    """Build a chain of `depth` subcommands, each with a sibling."""
+    node = {'command': f'level{depth - 1}', 'function': endpoint}
+    for level in reversed(range(depth - 1)):
+        node = {'command': f'level{level}',
+                'children': [node, {'command': 'other', 'function': endpoint}]}
+    return PromptSmartMenu([node], parser=InputParser(KwargCast, NumberCast))
+
+
+def main():
+    print(f'{"depth":>6} {"tree usec":>10} {"compiled usec":>14} '
+          f'{"speedup":>8}')
+    for depth in DEPTHS:
+        command = ' '.join(f'level{i}' for i in range(depth)) + ' 1 2 --k=3'
+        menu = build_menu(depth)
+        tree = timeit.timeit(lambda: menu.run(command), number=NUMBER)
+        menu.compile()
+        compiled = timeit.timeit(lambda: menu.run(command), number=NUMBER)
+        print(f'{depth:>6} {tree / NUMBER * 1e6:>10.2f} '
+              f'{compiled / NUMBER * 1e6:>14.2f} {tree / compiled:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
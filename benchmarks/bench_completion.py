@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""Benchmark per-keystroke completion against a large string-list child.
+
+Requires prompt_toolkit. Run with: python benchmarks/bench_completion.py
+"""
+import timeit
+
+from prompt_toolkit.completion import CompleteEvent, NestedCompleter
+from prompt_toolkit.document import Document
+
+from prompt_smart_menu import PromptSmartMenu
+
+
+CANDIDATES = 50000
+NUMBER = 200
+TEXT = 'ssh host0042'
+
+
+def endpoint(*args):
+    pass
+
+
+def build_menu(candidates: int) -> PromptSmartMenu:
+    """Build a menu whose end-point completes `candidates` host names."""
+    hosts = [f'host{i:05}' for i in range(candidates)]
+    return PromptSmartMenu([{'command': 'ssh', 'function': endpoint,
+                             'children': hosts}])
+
+
+def keystroke(completer) -> int:
+    """Complete TEXT once, as prompt_toolkit does on every keystroke."""
+    document = Document(TEXT, len(TEXT))
+    return len(list(completer.get_completions(document, CompleteEvent())))
+
+
+def main():
+    menu = build_menu(CANDIDATES)
+    completers = [
+        ('NestedCompleter', NestedCompleter.from_nested_dict(
+            menu.nested_completer_dict())),
+        ('SmartMenuCompleter', menu.completer()),
+    ]
+    print(f'{"completer":>20} {"matches":>8} {"usec/keystroke":>15}')
+    for name, completer in completers:
+        matches = keystroke(completer)
+        seconds = timeit.timeit(lambda: keystroke(completer), number=NUMBER)
+        print(f'{name:>20} {matches:>8} {seconds / NUMBER * 1e6:>15.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Benchmark subcommand dispatch against the number of sibling commands.
+
+Run with: python benchmarks/bench_dispatch.py
+"""
+import timeit
+
+from prompt_smart_menu import PromptSmartMenu
+
+
+FAN_OUTS = [10, 100, 1000, 10000, 100000]
+NUMBER = 20000
+
+
+def endpoint():
+    pass
+
+
+def build_menu(fan_out: int) -> PromptSmartMenu:
+    """Build a two level menu with `fan_out` hosts under one command."""
+    hosts = [{'command': f'host{i}', 'function': endpoint}
+             for i in range(fan_out)]
+    return PromptSmartMenu([{'command': 'ssh', 'children': hosts}])
+
+
+def main():
+    print(f'{"children":>10} {"usec/dispatch":>14}')
+    for fan_out in FAN_OUTS:
+        menu = build_menu(fan_out)
+        # Last child is the worst case for a linear scan
+        command = f'ssh host{fan_out - 1}'
+        seconds = timeit.timeit(lambda: menu.run(command), number=NUMBER)
+        print(f'{fan_out:>10} {seconds / NUMBER * 1e6:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""Benchmark the memory used per menu node.
+
+Run with: python benchmarks/bench_memory.py [--baseline]
+
+With --baseline, the menu is built from DictNode instead, a stand-in for
+menu nodes before they shared their settings and were split by kind: every
+node keeps each setting and index in its own instance __dict__, about 490
+bytes/node. On the 100101 node menu below, MenuNode took 314 bytes/node
+before slots, 250 with slotted nodes, and 194 with shared settings and
+separate branch and end-point classes.
+"""
+import gc
+import sys
+import tracemalloc
+
+from prompt_smart_menu import PromptSmartMenu
+from prompt_smart_menu.input_parser import InputParser
+
+
+GROUPS = 100
+LEAVES = 1000
+PARSER = InputParser()
+
+
+def endpoint(*args):
+    pass
+
+
+class DictNode:
+    """An unslotted menu node holding its own copy of every setting."""
+
+    def __init__(self, config: dict, parent: 'DictNode' = None) -> None:
+        self.command = sys.intern(config['command'])
+        self.function = config.get('function')
+        self.aliases = ()
+        self.parser = PARSER
+        self.validate_args = False
+        self.stream_args = False
+        self.execution = 'inline'
+        self.lazy = False
+        self.prefix_match = False
+        self.fuzzy_match = False
+        self.validate_choices = False
+        self.parent = parent
+        self.menu = None
+        self.words = None
+        self.child_index = {}
+        self.alias_index = {}
+        self.prefixes = None
+        self.fuzzy = None
+        self.revision = 0
+        self.validator = None
+        self.choices = None
+        children = config.get('children', ())
+        if self.function:
+            self.children = tuple(children)
+        else:
+            for child in children:
+                node = DictNode(child, self)
+                self.child_index[node.command] = node
+            self.children = tuple(self.child_index.values())
+
+
+def build_config() -> list:
+    """Build a config of GROUPS nodes with LEAVES end-points each."""
+    return [{'command': f'group{g}',
+             'children': [{'command': f'leaf{leaf}', 'function': endpoint,
+                           'children': ['a', 'b']}
+                          for leaf in range(LEAVES)]}
+            for g in range(GROUPS)]
+
+
+def main():
+    baseline = '--baseline' in sys.argv[1:]
+    config = build_config()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    if baseline:
+        menu = DictNode({'command': '', 'children': config})
+    else:
+        menu = PromptSmartMenu(config)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    nodes = GROUPS * (LEAVES + 1) + 1
+    name = 'DictNode' if baseline else 'MenuNode'
+    print(f'{nodes} nodes: {(after - before) / nodes:.0f} bytes/node '
+          f'({name})')
+    return menu
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Benchmark replaying recorded commands with run_many() vs a run() loop.
+
+Run with: python benchmarks/bench_run_many.py
+"""
+import random
+import time
+
+from prompt_smart_menu import PromptSmartMenu
+from prompt_smart_menu.input_parser import InputParser, KwargCast, NumberCast
+
+
+COMMANDS = 100000
+
+
+def endpoint(*args, **kwargs):
+    pass
+
+
+def build_menu() -> PromptSmartMenu:
+    """Build a three level menu with a few end-points."""
+    leaves = [{'command': name, 'function': endpoint}
+              for name in ('status', 'config', 'logs')]
+    hosts = [{'command': f'host{i}', 'children': [dict(leaf)
+                                                  for leaf in leaves]}
+             for i in range(100)]
+    return PromptSmartMenu([{'command': 'show', 'children': hosts}],
+                           parser=InputParser(KwargCast, NumberCast))
+
+
+def recorded_commands(grouped: bool) -> list:
+    """Generate a replay log, optionally with runs of the same subcommands."""
+    random.seed(0)
+    commands = []
+    while len(commands) < COMMANDS:
+        path = (f'show host{random.randrange(100)} '
+                f'{random.choice(["status", "config", "logs"])}')
+        for _ in range(20 if grouped else 1):
+            commands.append(f'{path} {random.randrange(1000)} --tail=10')
+    return commands[:COMMANDS]
+
+
+def throughput(function) -> float:
+    """Return commands per second for function()."""
+    start = time.perf_counter()
+    function()
+    return COMMANDS / (time.perf_counter() - start)
+
+
+def main():
+    print(f'{"log":>8} {"run() loop":>12} {"run_many()":>12}  (commands/s)')
+    for grouped in (False, True):
+        commands = recorded_commands(grouped)
+        menu = build_menu()
+        naive = throughput(lambda: [menu.run(c) for c in commands])
+        menu = build_menu()
+        batch = throughput(lambda: list(menu.run_many(commands)))
+        print(f'{"grouped" if grouped else "random":>8} {naive:>12.0f} '
+              f'{batch:>12.0f}')
+
+
+if __name__ == '__main__':
+    main()
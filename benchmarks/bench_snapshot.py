@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Benchmark startup: building a menu from menu_config vs loading a snapshot.
+
+Run with: python benchmarks/bench_snapshot.py
+"""
+import os
+import tempfile
+import time
+
+from prompt_smart_menu import PromptSmartMenu
+from prompt_smart_menu.input_parser import InputParser, KwargCast, NumberCast
+
+
+GROUPS = 200
+LEAVES = 250
+
+
+def endpoint(*args, **kwargs):
+    pass
+
+
+def build_config() -> list:
+    """Build a config of GROUPS nodes with LEAVES end-points each."""
+    return [{'command': f'group{g}',
+             'children': [{'command': f'leaf{leaf}', 'function': endpoint,
+                           'children': ['alpha', 'beta']}
+                          for leaf in range(LEAVES)]}
+            for g in range(GROUPS)]
+
+
+def timed(function) -> float:
+    """Return the seconds taken by function()."""
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    config = build_config()
+    parser = InputParser(KwargCast, NumberCast)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'menu.json')
+        cold = timed(lambda: PromptSmartMenu(config, parser=parser,
+                                             validate_args=True))
+        PromptSmartMenu(config, parser=parser).save_snapshot(path)
+        load = timed(lambda: PromptSmartMenu.load_snapshot(path))
+        size = os.path.getsize(path)
+
+    nodes = GROUPS * (LEAVES + 1)
+    print(f'{nodes} nodes, snapshot {size / 1024:.0f} KiB')
+    print(f'{"cold build":>14} {cold * 1000:>8.1f} ms')
+    print(f'{"snapshot load":>14} {load * 1000:>8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
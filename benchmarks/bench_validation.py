@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Benchmark end-point dispatch with and without argument validation.
+
+Run with: python benchmarks/bench_validation.py
+"""
+import timeit
+
+from prompt_smart_menu import PromptSmartMenu
+from prompt_smart_menu.input_parser import InputParser, KwargCast, NumberCast
+
+
+NUMBER = 20000
+COMMAND = 'report 2020 12 --fmt=csv --verbose=1'
+
+
+def report(year, month, day=1, *, fmt='txt', verbose=0, **options):
+    pass
+
+
+def build_menu(validate_args: bool) -> PromptSmartMenu:
+    """Build a menu with a single end-point taking mixed arguments."""
+    return PromptSmartMenu([{'command': 'report', 'function': report}],
+                           parser=InputParser(KwargCast, NumberCast),
+                           validate_args=validate_args)
+
+
+def main():
+    print(f'{"validate_args":>14} {"usec/dispatch":>14}')
+    for validate_args in (False, True):
+        menu = build_menu(validate_args)
+        seconds = timeit.timeit(lambda: menu.run(COMMAND), number=NUMBER)
+        print(f'{str(validate_args):>14} {seconds / NUMBER * 1e6:>14.2f}')
+
+
+if __name__ == '__main__':
+    main()
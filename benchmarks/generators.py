@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""Synthetic menus and command strings for the benchmark suite.
+
+Menu generators return a menu_config list for PromptSmartMenu. Input
+generators return the argument part of a command string. All output is
+deterministic, so results can be compared across commits.
+"""
+import random
+from typing import List
+
+from prompt_smart_menu import NestedDict
+
+
+def endpoint(*args, **kwargs):
+    pass
+
+
+def wide_menu(children: int) -> List[dict]:
+    """A command with `children` end-points, named item0, item1, ..."""
+    return [{'command': 'wide',
+             'children': [{'command': f'item{i}', 'function': endpoint}
+                          for i in range(children)]}]
+
+
+def wide_command(children: int) -> str:
+    """The subcommands of the last end-point of wide_menu(children)."""
+    return f'wide item{children - 1}'
+
+
+def deep_menu(depth: int) -> List[dict]:
+    """A chain of `depth` subcommands, level0 to level<depth-1>.
+
+    Every level also has a sibling end-point, so no level has a single child.
+    """
+    node = {'command': f'level{depth - 1}', 'function': endpoint}
+    for level in reversed(range(depth - 1)):
+        node = {'command': f'level{level}',
+                'children': [node, {'command': 'other', 'function': endpoint}]}
+    return [node]
+
+
+def deep_command(depth: int) -> str:
+    """The subcommands of the deepest end-point of deep_menu(depth)."""
+    return ' '.join(f'level{level}' for level in range(depth))
+
+
+def string_list_menu(end_points: int, words: int) -> List[dict]:
+    """`end_points` end-points, each completing `words` string children."""
+    return [{'command': f'list{i}', 'function': endpoint,
+             'children': [f'word{i}_{w}' for w in range(words)]}
+            for i in range(end_points)]
+
+
+def nested_dict_menu(end_points: int, depth: int, fan_out: int
+                     ) -> List[dict]:
+    """`end_points` end-points, each completing a NestedDict.
+
+    Each NestedDict is `depth` levels of `fan_out` keys, ending in sets of
+    `fan_out` words.
+    """
+    def nest(level: int) -> dict:
+        if level == depth:
+            return {f'leaf{k}': {f'w{w}' for w in range(fan_out)}
+                    for k in range(fan_out)}
+        return {f'key{k}': nest(level + 1) for k in range(fan_out)}
+
+    return [{'command': f'nest{i}', 'function': endpoint,
+             'children': NestedDict(nest(1))}
+            for i in range(end_points)]
+
+
+def long_args(count: int) -> str:
+    """`count` unquoted arguments, mixing words, ints and floats."""
+    rng = random.Random(count)
+    kinds = [lambda: f'word{rng.randrange(1000)}',
+             lambda: str(rng.randrange(-10 ** 6, 10 ** 6)),
+             lambda: f'{rng.uniform(-1000, 1000):.3f}']
+    return ' '.join(rng.choice(kinds)() for _ in range(count))
+
+
+def number_args(count: int) -> str:
+    """`count` unquoted arguments, all ints or floats."""
+    rng = random.Random(count)
+    return ' '.join(str(rng.randrange(10 ** 6)) if i % 2 else
+                    f'{rng.uniform(-1000, 1000):.3f}' for i in range(count))
+
+
+def int_args(count: int) -> str:
+    """`count` unquoted arguments, all ints, like a pasted list of IDs."""
+    rng = random.Random(count)
+    return ' '.join(str(rng.randrange(10 ** 9)) for _ in range(count))
+
+
+def word_args(count: int) -> str:
+    """`count` unquoted arguments that no built-in cast changes."""
+    return ' '.join(f'word{i}' for i in range(count))
+
+
+def quoted_args(count: int) -> str:
+    """`count` quoted arguments containing spaces, in all three quotes."""
+    quotes = '"\'`'
+    return ' '.join(f'{quotes[i % 3]}some quoted {i}{quotes[i % 3]}'
+                    for i in range(count))
+
+
+def kwargs_args(count: int) -> str:
+    """`count` keyword arguments, --key0=0 --key1=1 ..."""
+    return ' '.join(f'--key{i}={i}' for i in range(count))
@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""Benchmark suite for parsing, dispatch, validation and completion.
+
+Runs every benchmark against synthetic menus and inputs from generators.py,
+prints a table and optionally writes the results as JSON, so that runs on
+different commits can be compared.
+
+Run with: python benchmarks/suite.py [-o results.json] [--compare base.json]
+
+Each result is the fastest time of one call over several repeats, which
+is the least disturbed by other work on the machine, along with the median.
+With --compare, benchmarks that got slower than the baseline by more than
+--threshold are reported and the exit status is 1.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from typing import Dict, List
+
+import generators
+from prompt_smart_menu import PromptSmartMenu
+from prompt_smart_menu.input_parser import InputParser, KwargCast, NumberCast
+
+
+RESULTS_FORMAT = 1
+
+# setup() returns the state passed to run(state). Warm benchmarks call run()
+# many times on one state, cold ones call setup() again before every run().
+Benchmark = namedtuple('Benchmark', ['name', 'setup', 'run', 'cold'])
+
+
+def parser() -> InputParser:
+    return InputParser(KwargCast, NumberCast)
+
+
+def parse_benchmarks() -> List[Benchmark]:
+    """InputParser.parse() on long, quoted and keyword argument lists."""
+    inputs = [('long', generators.long_args, [10, 100, 1000]),
+              ('numbers', generators.number_args, [100]),
+              ('words', generators.word_args, [100]),
+              ('quoted', generators.quoted_args, [10, 100]),
+              ('kwargs', generators.kwargs_args, [10, 100])]
+    benchmarks = []
+    for kind, generate, sizes in inputs:
+        for size in sizes:
+            benchmarks.append(Benchmark(
+                f'parse/{kind}/{size}',
+                lambda generate=generate, size=size: (parser(),
+                                                      generate(size)),
+                lambda state: state[0].parse(state[1], recurse=True),
+                False))
+    # A command string repeated, as scripts do
+    benchmarks.append(Benchmark(
+        'parse/long/100/cached',
+        lambda: (InputParser(KwargCast, NumberCast, cache_size=128),
+                 generators.long_args(100)),
+        lambda state: state[0].parse(state[1], recurse=True),
+        False))
+    return benchmarks
+
+
+def process_arg_benchmarks() -> List[Benchmark]:
+    """MenuNode.process_arg() from the root of wide and deep menus."""
+    menus = [('wide', generators.wide_menu, generators.wide_command,
+              [10, 1000, 100000]),
+             ('deep', generators.deep_menu, generators.deep_command,
+              [2, 10, 50])]
+    benchmarks = []
+    for kind, menu, command, sizes in menus:
+        for size in sizes:
+            def setup(menu=menu, command=command, size=size):
+                root = PromptSmartMenu(menu(size), parser=parser())._root
+                return (root, f'{command(size)} 1 2.5 word --key=3')
+
+            benchmarks.append(Benchmark(
+                f'process_arg/{kind}/{size}', setup,
+                lambda state: state[0].process_arg(state[1]), False))
+
+    # An argument checked against an end-point's string children
+    def setup_choices():
+        root = PromptSmartMenu(generators.string_list_menu(1, 100000),
+                               validate_choices=True)._root
+        return (root, 'list0 word0_99999')
+
+    benchmarks.append(Benchmark(
+        'process_arg/choices/100000', setup_choices,
+        lambda state: state[0].process_arg(state[1]), False))
+    return benchmarks
+
+
+def suggestion_benchmarks() -> List[Benchmark]:
+    """Suggesting subcommands for a typo, the first time including building
+    the typo index, and then with the index built.
+    """
+    benchmarks = []
+    for size in [1000, 100000]:
+        def setup(size=size):
+            node = PromptSmartMenu(generators.wide_menu(size))._root
+            return (node._get_child('wide'), f'itme{size - 1}')
+
+        def setup_indexed(setup=setup):
+            state = setup()
+            state[0]._suggest(state[1])
+            return state
+
+        benchmarks.append(Benchmark(
+            f'suggest/wide/{size}', setup,
+            lambda state: state[0]._suggest(state[1]), True))
+        benchmarks.append(Benchmark(
+            f'suggest/wide/{size}/indexed', setup_indexed,
+            lambda state: state[0]._suggest(state[1]), False))
+    return benchmarks
+
+
+def validate_benchmarks() -> List[Benchmark]:
+    """MenuNode._validate_function_args() with many keyword arguments."""
+    benchmarks = []
+    for size in [10, 100]:
+        def setup(size=size):
+            menu = PromptSmartMenu(generators.wide_menu(1), parser=parser(),
+                                   validate_args=True)
+            node = menu._root._get_child('wide')._get_child('item0')
+            args = parser().parse(f'{generators.long_args(size)} '
+                                  f'{generators.kwargs_args(size)}',
+                                  recurse=True)
+            return (node, args)
+
+        benchmarks.append(Benchmark(
+            f'validate/kwargs/{size}', setup,
+            lambda state: state[0]._validate_function_args(state[1]), False))
+    return benchmarks
+
+
+def get_menu_benchmarks() -> List[Benchmark]:
+    """Building nested_completer_dict() for each kind of menu, uncached."""
+    menus = [('wide/10000', lambda: generators.wide_menu(10000)),
+             ('deep/50', lambda: generators.deep_menu(50)),
+             ('string_list/100x100',
+              lambda: generators.string_list_menu(100, 100)),
+             ('nested_dict/100x3x5',
+              lambda: generators.nested_dict_menu(100, 3, 5))]
+    return [Benchmark(f'get_menu/{name}',
+                      lambda menu=menu: PromptSmartMenu(menu())._root,
+                      lambda root: root.get_menu(), True)
+            for name, menu in menus]
+
+
+def completion_benchmarks() -> List[Benchmark]:
+    """SmartMenuCompleter keystrokes, if prompt_toolkit is installed."""
+    try:
+        from prompt_toolkit.completion import CompleteEvent
+        from prompt_toolkit.document import Document
+    except ImportError:
+        return []
+
+    def setup():
+        menu = PromptSmartMenu(generators.string_list_menu(100, 10000))
+        text = 'list99 word99_99'
+        return (menu.completer(), Document(text, len(text)), CompleteEvent())
+
+    return [Benchmark(
+        'completion/string_list/100x10000', setup,
+        lambda state: list(state[0].get_completions(state[1], state[2])),
+        False)]
+
+
+def all_benchmarks() -> List[Benchmark]:
+    return (parse_benchmarks() + process_arg_benchmarks() +
+            suggestion_benchmarks() + validate_benchmarks() +
+            get_menu_benchmarks() + completion_benchmarks())
+
+
+def measure(benchmark: Benchmark, repeat: int, min_time: float) -> dict:
+    """Time one call of a benchmark, `repeat` times."""
+    if benchmark.cold:
+        number = 1
+    else:
+        # Calibrate the calls per repeat, so each repeat takes min_time
+        state = benchmark.setup()
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                benchmark.run(state)
+            if time.perf_counter() - start >= min_time:
+                break
+            number *= 2
+
+    times = []
+    for _ in range(repeat):
+        if benchmark.cold:
+            state = benchmark.setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            benchmark.run(state)
+        times.append((time.perf_counter() - start) / number)
+    return {'usec': min(times) * 1e6,
+            'median_usec': statistics.median(times) * 1e6,
+            'repeat': repeat,
+            'number': number}
+
+
+def git_commit() -> str:
+    """Return the current git commit, or None outside a git checkout."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.DEVNULL,
+                              universal_newlines=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict],
+            threshold: float) -> List[str]:
+    """Print results against a baseline and return the slower benchmarks."""
+    slower = []
+    print(f'\n{"benchmark":<36} {"base usec":>12} {"usec":>12} '
+          f'{"change":>8}')
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]['usec']
+        ratio = result['usec'] / base
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  slower'
+            slower.append(name)
+        elif ratio < 1 - threshold:
+            flag = '  faster'
+        print(f'{name:<36} {base:>12.2f} {result["usec"]:>12.2f} '
+              f'{(ratio - 1) * 100:>+7.1f}%{flag}')
+    return slower
+
+
+def main(argv: List[str] = None) -> int:
+    args = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    args.add_argument('-o', '--output', help='write results to a JSON file')
+    args.add_argument('--compare', metavar='BASELINE',
+                      help='compare with results saved by --output')
+    args.add_argument('--threshold', type=float, default=0.1,
+                      help='relative change reported by --compare '
+                           '(default: 0.1)')
+    args.add_argument('-k', '--filter', default='',
+                      help='only run benchmarks whose name contains this')
+    args.add_argument('--repeat', type=int, default=7,
+                      help='repeats per benchmark (default: 7)')
+    args.add_argument('--min-time', type=float, default=0.05,
+                      help='seconds per repeat of warm benchmarks '
+                           '(default: 0.05)')
+    args = args.parse_args(argv)
+
+    results = {}
+    print(f'{"benchmark":<36} {"usec":>12} {"median usec":>12}')
+    for benchmark in all_benchmarks():
+        if args.filter not in benchmark.name:
+            continue
+        result = results[benchmark.name] = measure(benchmark, args.repeat,
+                                                   args.min_time)
+        print(f'{benchmark.name:<36} {result["usec"]:>12.2f} '
+              f'{result["median_usec"]:>12.2f}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'format': RESULTS_FORMAT,
+                       'commit': git_commit(),
+                       'python': platform.python_version(),
+                       'platform': platform.platform(),
+                       'results': results}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('format') != RESULTS_FORMAT:
+            sys.exit(f'Not a version {RESULTS_FORMAT} results file: '
+                     f'{args.compare}')
+        if compare(results, baseline['results'], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
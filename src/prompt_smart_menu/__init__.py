@@ -10,23 +10,57 @@ Description: prompt_smart_menu is a library for building command line menus for
 
 See documentation for usage.
 """
-from pkg_resources import DistributionNotFound, get_distribution
-
-try:
-    dist_name = __name__
-    __version__ = get_distribution(dist_name).version
-except DistributionNotFound:
-    __version__ = 'unknown'
-finally:
-    del get_distribution, DistributionNotFound
-
-from .helpers import NestedDict
-from .smart_menu import PromptSmartMenu
-
+import sys
+from importlib import import_module
 
 __author__ = "Yesha"
 __copyright__ = "Copyright (c) Yesha, 2020"
 __license__ = "mit"
 
 
-__all__ = ['NestedDict', 'PromptSmartMenu']
+__all__ = ['ChildrenProvider', 'NestedDict', 'PromptSmartMenu']
+
+# Public names and the submodules they are imported from on first use
+_LAZY_IMPORTS = {'ChildrenProvider': 'prompt_smart_menu.providers',
+                 'NestedDict': 'prompt_smart_menu.helpers',
+                 'PromptSmartMenu': 'prompt_smart_menu.smart_menu'}
+
+
+def _get_version() -> str:
+    """Look up the installed distribution's version."""
+    try:
+        from importlib.metadata import PackageNotFoundError, version
+    except ImportError:  # Python < 3.8
+        from pkg_resources import DistributionNotFound as PackageNotFoundError
+        from pkg_resources import get_distribution
+
+        def version(dist_name: str) -> str:
+            return get_distribution(dist_name).version
+    try:
+        return version(__name__)
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def __getattr__(name: str):  # noqa: ANN
+    """Import public names and look up `__version__` on first access."""
+    if name == '__version__':
+        value = _get_version()
+    elif name in _LAZY_IMPORTS:
+        value = getattr(import_module(_LAZY_IMPORTS[name]), name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    """List lazy attributes along with those already set."""
+    return sorted(set(globals()) | set(__all__) | {'__version__'})
+
+
+if sys.version_info < (3, 7):  # No module __getattr__, import eagerly
+    from .helpers import NestedDict
+    from .providers import ChildrenProvider
+    from .smart_menu import PromptSmartMenu
+    __version__ = _get_version()
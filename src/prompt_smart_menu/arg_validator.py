@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Validate arguments against a function's signature."""
+from inspect import Parameter, signature
+from typing import Callable, List
+
+from prompt_smart_menu.helpers import InvalidArgError, Kwarg
+
+
+class ArgValidator:
+    """Checks arguments against a function's signature without calling it.
+
+    The signature is inspected once, when the validator is created, so that
+    validating a call only has to look at the arguments of that call.
+    """
+
+    def __init__(self, function: Callable) -> None:
+        """Compile the signature of function."""
+        self.function = function
+        self._name = getattr(function, '__name__', repr(function))
+        self._positional = []
+        self._positional_only = set()
+        self._keywords = set()
+        self._required_positional = []
+        self._required_keyword_only = []
+        self._var_positional = False
+        self._var_keyword = False
+
+        for name, param in signature(function).parameters.items():
+            required = param.default is Parameter.empty
+            if param.kind == Parameter.VAR_POSITIONAL:
+                self._var_positional = True
+            elif param.kind == Parameter.VAR_KEYWORD:
+                self._var_keyword = True
+            elif param.kind == Parameter.KEYWORD_ONLY:
+                self._keywords.add(name)
+                if required:
+                    self._required_keyword_only.append(name)
+            else:
+                if param.kind == Parameter.POSITIONAL_ONLY:
+                    self._positional_only.add(name)
+                else:
+                    self._keywords.add(name)
+                if required:
+                    self._required_positional.append(
+                        (len(self._positional), name))
+                self._positional.append(name)
+
+    def validate(self, args: list, kwargs: List[Kwarg]) -> None:
+        """Validate positional arguments and Kwargs for a call.
+
+        Raises:
+            InvalidArgError: If calling the function with these arguments
+                would raise a TypeError or SyntaxError.
+        """
+        name = self._name
+
+        # Process kwargs
+        keywords = set()
+        for kwarg in kwargs:
+            keyword = kwarg.key()
+            if keyword in keywords:
+                e = SyntaxError(f'keyword argument repeated: {keyword}')
+                raise InvalidArgError(e)
+            keywords.add(keyword)
+            if keyword in self._keywords or self._var_keyword:
+                continue
+            if keyword in self._positional_only:
+                e = TypeError(f"{name}() got some positional-only arguments "
+                              f"passed as keyword arguments: '{keyword}'")
+            else:
+                e = TypeError(f"{name}() got an unexpected keyword argument "
+                              f"'{keyword}'")
+            raise InvalidArgError(e)
+
+        # Process args
+        number_args = len(args)
+        if number_args > len(self._positional) and not self._var_positional:
+            e = TypeError(f"{name}() takes {len(self._positional)} "
+                          f"positional arguments but {number_args} were "
+                          f"given")
+            raise InvalidArgError(e)
+        if keywords:
+            for p in self._positional[:number_args]:
+                if p in keywords and p not in self._positional_only:
+                    e = TypeError(f"{name}() got multiple values for "
+                                  f"argument '{p}'")
+                    raise InvalidArgError(e)
+
+        # Required params missing
+        missing_positional = [p for i, p in self._required_positional
+                              if i >= number_args and
+                              (p not in keywords or
+                               p in self._positional_only)]
+        if missing_positional:
+            e = TypeError(f"{name}() missing {len(missing_positional)} "
+                          f"required arguments: {missing_positional}")
+            raise InvalidArgError(e)
+
+        missing_keyword_only = [p for p in self._required_keyword_only
+                                if p not in keywords]
+        if missing_keyword_only:
+            e = TypeError(f"{name}() missing {len(missing_keyword_only)} "
+                          f"required arguments: {missing_keyword_only}")
+            raise InvalidArgError(e)
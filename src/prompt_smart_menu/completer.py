@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""Auto-completion for prompt_toolkit driven by a PromptSmartMenu.
+
+Requires prompt_toolkit to be installed.
+"""
+from bisect import bisect_left
+
+try:
+    from prompt_toolkit.completion import (Completer, Completion,
+                                           NestedCompleter)
+    from prompt_toolkit.document import Document
+except ImportError as e:  # pragma: no cover
+    raise ImportError('prompt_smart_menu.completer requires prompt_toolkit.'
+                      ) from e
+
+from prompt_smart_menu.helpers import InvalidArgError, NestedDict
+
+# The most children whose providers are refreshed ahead of a keystroke
+_PREFETCH_LIMIT = 8
+
+
+def _provider(node):  # noqa: ANN
+    """Return an end-point's ChildrenProvider, or None."""
+    if (node._function and
+        node._children and
+        not isinstance(node._children, (tuple, NestedDict))
+    ):  # noqa E124
+        return node._children
+    return None
+
+
+class SmartMenuCompleter(Completer):
+    """A prompt_toolkit Completer that walks a PromptSmartMenu's nodes.
+
+    Completes like `NestedCompleter` given `menu.nested_completer_dict()`,
+    without building a completer tree. Each menu node keeps its completion
+    words sorted, so a keystroke costs a binary search plus the number of
+    completions returned, however many children the node has. Aliases and,
+    with prefix_match, abbreviated subcommands are followed but not offered
+    as completions.
+
+    Used asynchronously, as prompt_toolkit does with `complete_while_typing`,
+    stale children providers are awaited for up to `deadline` seconds rather
+    than completed from their old strings. See `get_completions_async()`.
+    """
+
+    def __init__(
+        self,
+        menu,  # noqa: ANN001
+        ignore_case: bool = True,
+        deadline: float = 0.1
+    ) -> None:
+        """Initialize with a PromptSmartMenu.
+
+        Args:
+            menu (PromptSmartMenu): The menu to complete commands for.
+            ignore_case (bool): If true, completion is case insensitive.
+                Default: True
+            deadline (float): The most seconds `get_completions_async()`
+                waits for children providers. Default: 0.1
+        """
+        self._root = menu._root
+        self._ignore_case = ignore_case
+        self._deadline = deadline
+        self._nested_completers = {}
+        self._request = 0
+
+    def _locate(self, text: str):  # noqa: ANN
+        """Find the menu node completing the end of a command string.
+
+        Returns:
+            tuple: (node, text) where text is the word being completed, or
+                the rest of the command string for a node with NestedDict
+                children. node is None if nothing completes text.
+        """
+        node = self._root
+        while True:
+            if isinstance(node._children, NestedDict):
+                return (node, text)
+
+            words = text.split(maxsplit=1)
+            if not words or (len(words) == 1 and not text[-1].isspace()):
+                return (node, words[0] if words else '')
+            if node._function:
+                return (None, text)
+            child = node._get_child(words[0])
+            if child is None and node._settings.prefix_match:
+                try:
+                    child = node._match_prefix(words[0])
+                except InvalidArgError:
+                    return (None, text)
+            node = child
+            if node is None:
+                return (None, text)
+            text = words[1] if len(words) > 1 else ''
+
+    def get_completions(self, document, complete_event):  # noqa: ANN
+        """Yield completions for the word before the cursor."""
+        node, text = self._locate(document.text_before_cursor.lstrip())
+        if node is not None:
+            yield from self._complete(node, text, complete_event)
+
+    def _complete(self, node, text: str, complete_event):  # noqa: ANN
+        """Yield completions of text, found by `_locate()`, for a node."""
+        if isinstance(node._children, NestedDict):
+            yield from self._nested_completer(node).get_completions(
+                Document(text, len(text)), complete_event)
+        else:
+            yield from self._complete_word(node, text)
+
+    async def get_completions_async(
+        self,
+        document,  # noqa: ANN001
+        complete_event  # noqa: ANN001
+    ):  # noqa: ANN
+        """Yield completions for the word before the cursor, asynchronously.
+
+        If the word is completed from a children provider whose strings are
+        stale, waits up to the deadline for them to be refreshed, then
+        yields whatever strings are available. Stale providers of the
+        end-points being completed, which the next word may need, are
+        refreshed concurrently in the background. A request is dropped,
+        yielding nothing, once a newer one has started, and cancelling it
+        doesn't cancel the refreshes it started.
+        """
+        import asyncio
+        self._request += 1
+        request = self._request
+
+        node, text = self._locate(document.text_before_cursor.lstrip())
+        if node is None:
+            return
+        if node._function:
+            provider = _provider(node)
+            if provider is not None and provider._stale():
+                try:
+                    await asyncio.wait_for(provider._wait_async(),
+                                           self._deadline)
+                except asyncio.TimeoutError:
+                    pass
+                if request != self._request:
+                    return
+        else:
+            self._prefetch(node, text)
+
+        for completion in self._complete(node, text, complete_event):
+            yield completion
+
+    def _prefetch(self, node, prefix: str) -> None:  # noqa: ANN
+        """Start refreshing stale providers of the children matching prefix.
+
+        Up to _PREFETCH_LIMIT of the children are checked.
+        """
+        keys, words = node._completion_index()
+        key = prefix.lower()
+        i = bisect_left(keys, key)
+        for i in range(i, min(i + _PREFETCH_LIMIT, len(keys))):
+            if not keys[i].startswith(key):
+                break
+            child = node._get_child(words[i])
+            provider = _provider(child) if child is not None else None
+            if provider is not None and provider._stale():
+                provider._refresh_in_background()
+
+    def _complete_word(self, node, prefix: str):  # noqa: ANN
+        """Yield a node's completion words that start with prefix."""
+        keys, words = node._completion_index()
+        key = prefix.lower()
+        for i in range(bisect_left(keys, key), len(keys)):
+            if not keys[i].startswith(key):
+                break
+            if self._ignore_case or words[i].startswith(prefix):
+                yield Completion(words[i], start_position=-len(prefix))
+
+    def _nested_completer(self, node) -> NestedCompleter:  # noqa: ANN
+        """Return a NestedCompleter for a node with NestedDict children."""
+        nest = node._children.nest
+        completer = self._nested_completers.get(node)
+        if completer is None or completer[0] is not nest:
+            completer = (nest, NestedCompleter.from_nested_dict(nest))
+            self._nested_completers[node] = completer
+        return completer[1]
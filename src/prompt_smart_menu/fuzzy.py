@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""Typo tolerant lookup of menu words, for suggestions and fuzzy matching.
+
+Only imported once a command has a subcommand that isn't found.
+"""
+from typing import Iterable, List, Tuple
+
+
+class EditIndex:
+    """Finds the words within one edit of a query, ignoring case.
+
+    An edit is an insertion, deletion or substitution of a character, or a
+    transposition of two adjacent characters. The words are only stored by
+    lowercase key, with the set of characters they use, so the index is built
+    in a single pass. A query looks up each of its edits using those
+    characters, about 2 * len(query) * len(characters) dict lookups, instead
+    of computing an edit distance against every word.
+    """
+
+    __slots__ = ('_index', '_alphabet')
+
+    def __init__(self, words: Iterable[str]) -> None:
+        """Initialize with the words to look up."""
+        index = {}
+        for word in words:
+            key = word.lower()
+            if key == word:
+                key = word
+            # Most keys belong to a single word, which is stored as is
+            found = index.get(key)
+            if found is None:
+                index[key] = word
+            elif type(found) is list:
+                found.append(word)
+            else:
+                index[key] = [found, word]
+        self._index = index
+        self._alphabet = tuple(set(''.join(index)))
+
+    def lookup(self, query: str) -> List[Tuple[int, str]]:
+        """Return the words within one edit of query.
+
+        Returns:
+            list: (distance, word) pairs, closest first. A distance of 0 means
+                the word only differs from query by case.
+        """
+        query = query.lower()
+        index = self._index
+        alphabet = self._alphabet
+        keys = {query} if query in index else set()
+        for i in range(len(query) + 1):
+            head = query[:i]
+            tail = query[i:]
+            for c in alphabet:
+                key = head + c + tail
+                if key in index:
+                    keys.add(key)
+            if not tail:
+                break
+            rest = tail[1:]
+            key = head + rest
+            if key in index:
+                keys.add(key)
+            for c in alphabet:
+                key = head + c + rest
+                if key in index:
+                    keys.add(key)
+            if rest:
+                key = head + rest[0] + tail[0] + rest[1:]
+                if key in index:
+                    keys.add(key)
+
+        matches = []
+        for key in keys:
+            d = 0 if key == query else 1
+            found = index[key]
+            if type(found) is list:
+                matches.extend((d, word) for word in found)
+            else:
+                matches.append((d, found))
+        matches.sort()
+        return matches
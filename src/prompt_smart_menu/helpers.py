@@ -9,6 +9,8 @@ class NestedDict:
         NestedCompleter.from_nested_dict(dict)
     """
 
+    __slots__ = ('_nest',)
+
     def __init__(self, nest: dict) -> None:
         """Initialize with dict."""
         self._nest = nest
@@ -19,9 +21,30 @@ class NestedDict:
         return self._nest
 
 
+class ChoiceSet(set):
+    """A set of strings that can't be changed once built.
+
+    A set rather than a frozenset, as prompt_toolkit's NestedCompleter only
+    accepts sets, so the same ChoiceSet can be shared by the completion dict
+    and argument validation.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs) -> None:  # noqa: ANN
+        raise TypeError(f'{self.__class__.__name__} is read-only.')
+
+    add = discard = remove = pop = clear = update = _read_only
+    difference_update = intersection_update = _read_only
+    symmetric_difference_update = _read_only
+    __ior__ = __iand__ = __isub__ = __ixor__ = _read_only
+
+
 class Kwarg:
     """Represents a keyword argument as a key and value."""
 
+    __slots__ = ('_key', '_value')
+
     def __init__(self, key: str, value) -> None:  # noqa: ANN
         """Initialize with key and value."""
         self._key = key
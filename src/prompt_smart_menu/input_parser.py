@@ -2,16 +2,56 @@
 """Parse a command string into arguments."""
 import keyword
 import re
-from typing import Union
+import string
+from array import array
+from collections import namedtuple
+from functools import lru_cache, partial
+from itertools import repeat
+from typing import Callable, Iterator, Union
 
 from prompt_smart_menu.helpers import InvalidArgError, Kwarg
 
 
+# Matches one argument and the whitespace before it. Groups 1-3 are the
+# contents of a quoted argument, group 4 an unquoted argument and group 5 an
+# opening quote without a closing quote.
+_token_re = re.compile(r'\s*(?:"([^"]*)"|\'([^\']*)\'|`([^`]*)`|'
+                       r'([^\s"\'`]\S*)|(["\'`]))')
+
+
+CACHE_POLICIES = ('lru', 'fifo')
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
 class InputParser:
     """For parsing a command string into desired types or objects."""
 
-    def __init__(self, *args) -> None:  # noqa: ANN002
-        """Initialize with various Cast objects."""
+    def __init__(
+        self,
+        *args,  # noqa: ANN002
+        pack_numbers: bool = False,
+        cache_size: int = 0,
+        cache_policy: str = 'lru'
+    ) -> None:
+        """Initialize with various Cast objects.
+
+        Args:
+            *args: Cast objects, applied in order to each argument.
+            pack_numbers (bool): If true and every positional argument of a
+                parse(recurse=True) is an int, they are returned as a single
+                `array('q')`, or if they are ints and floats, as a single
+                `array('d')`. Default: False
+            cache_size (int): If more than 0, parse() caches the results of
+                up to this many command strings, and returns results as
+                tuples. Each result gets its own copies of Kwargs and arrays,
+                but other cast values are shared, so a cast returning mutable
+                objects should set `cacheable = False`, which disables the
+                cache. Default: 0
+            cache_policy (str): Which cached result is evicted when the
+                cache is full: 'lru', the least recently used, or 'fifo',
+                the oldest. Default: 'lru'
+        """
         self._casts = []
         for a in args:
             if not hasattr(a, 'type_cast'):
@@ -19,24 +59,133 @@ class InputParser:
             self._casts.append(a)
         if not self._casts:
             self._casts = [DefaultCast]
+        if cache_policy not in CACHE_POLICIES:
+            raise ValueError(f'cache_policy must be one of {CACHE_POLICIES}.')
+        if cache_size < 0:
+            raise ValueError('cache_size cannot be negative.')
+        self._pack_numbers = pack_numbers
+        self._cache_size = cache_size
+        self._cache_policy = cache_policy
+        self._cast_chain = self._compile_casts(self._casts)
+        self._cast_many = self._compile_bulk_casts(self._casts)
+
+        self._cache = None
+        if (cache_size and
+            all(getattr(cast, 'cacheable', True) for cast in self._casts)
+        ):  # noqa E124
+            if cache_policy == 'lru':
+                self._cache = lru_cache(maxsize=cache_size)(
+                    self._parse_tuple)
+            else:
+                self._cache = _FifoCache(self._parse_tuple, cache_size)
+
+    def _options(self) -> dict:
+        """Return the keyword arguments this parser was created with."""
+        return {'pack_numbers': self._pack_numbers,
+                'cache_size': self._cache_size,
+                'cache_policy': self._cache_policy}
+
+    def cache_info(self) -> CacheInfo:
+        """Return statistics of the parse() cache.
+
+        Returns:
+            CacheInfo: A named tuple of hits, misses, maxsize and currsize,
+                like `functools.lru_cache`. All 0 if the cache is disabled.
+        """
+        if self._cache is None:
+            return CacheInfo(0, 0, 0, 0)
+        return CacheInfo(*self._cache.cache_info())
+
+    def cache_clear(self) -> None:
+        """Empty the parse() cache and reset its statistics."""
+        if self._cache is not None:
+            self._cache.cache_clear()
 
     def _type_cast(self, item: str):  # noqa: ANN
         """Cast types if able."""
-        for cast in self._casts:
-            item = cast.type_cast(item)
-        return item
+        return self._cast_chain(item)
+
+    @staticmethod
+    def _compile_casts(casts: list) -> Callable:
+        """Fuse a chain of casts into a single function.
 
-    def _parse_quotes(self, input_string: str) -> list:
-        """Extract a quoted string."""
-        delim = input_string[0]
-        end_index = input_string.find(delim, 1)
-        if end_index == -1:
-            raise ValueError(f'No closing quote found in: {input_string}')
-        return input_string[1:].split(delim, maxsplit=1)
+        The built-in casts are replaced by versions that check the first
+        characters of a string before trying to cast it, so most arguments
+        skip the casts that can't apply to them. Other casts are called
+        through their type_cast().
+        """
+        steps = []
+        for cast in casts:
+            if cast is DefaultCast:
+                continue
+            steps.append(_FAST_CASTS.get(cast, cast.type_cast))
+        if not steps:
+            return _no_cast
+        if len(steps) == 1:
+            return steps[0]
+        if len(steps) == 2:
+            first, second = steps
+            return lambda item: second(first(item))
+
+        def chain(item):  # noqa: ANN
+            for step in steps:
+                item = step(item)
+            return item
+        return chain
+
+    @staticmethod
+    def _compile_bulk_casts(casts: list) -> Callable:
+        """Fuse a chain of casts into a function casting a list of items.
+
+        Casts with a type_cast_many() are given the whole list. Runs of
+        other casts are fused, as by _compile_casts(), and mapped over it.
+        """
+        steps = []
+        group = []
+        for cast in casts:
+            many = getattr(cast, 'type_cast_many', None)
+            if many is None:
+                group.append(cast)
+                continue
+            if group:
+                steps.append(partial(_map_list,
+                                     InputParser._compile_casts(group)))
+                group = []
+            steps.append(many)
+        if group or not steps:
+            cast_chain = InputParser._compile_casts(group)
+            steps.append(list if cast_chain is _no_cast else
+                         partial(_map_list, cast_chain))
+        if len(steps) == 1:
+            return steps[0]
+
+        def chain(items: list) -> list:
+            for step in steps:
+                items = step(items)
+            return items
+        return chain
+
+    @staticmethod
+    def _tokenize(input_string: str) -> Iterator[tuple]:
+        """Split a command string into raw arguments in a single pass.
+
+        Yields:
+            tuple: (argument, quoted, end) where quoted is true if the
+                argument was enclosed in quotes and end is the index just past
+                the argument in input_string.
+        """
+        for match in _token_re.finditer(input_string):
+            group = match.lastindex
+            if group == 5:
+                raise ValueError(f'No closing quote found in: '
+                                 f'{input_string[match.start(5):]}')
+            yield match.group(group), group != 4, match.end()
 
     def parse(self, input_string: str, recurse: bool = False) -> list:
         """Parse an argument from a command string.
 
+        Quoted arguments are taken literally and are not type cast.
+
         Args:
             input_string (str): command string to be prased
             recurse (bool): If true, the entire input_string is parsed.
@@ -44,28 +193,75 @@ class InputParser:
 
         Returns:
             list: A list of parsed commands. If recurse=False, the list has
-                two items. The first is the parsed argument, the second is
-                the remaining command string.
+                at most two items. The first is the parsed argument, the
+                second is the remaining command string, if any. A tuple if
+                the parser has a cache.
         """
-        s = input_string.lstrip()
-        if s == '':
-            return []
-
-        if s[0] in ['"', "'", '`']:
-            split_string = self._parse_quotes(s)
-            split_string[1] = split_string[1].lstrip()
-            if split_string[1] == '':
-                return split_string[0:1]
-        else:
-            split_string = s.split(maxsplit=1)
+        if self._cache is not None:
+            return _copy_mutable(self._cache(input_string, recurse))
+        return self._parse(input_string, recurse)
 
-        split_string[0] = self._type_cast(split_string[0])
-        if len(split_string) == 1 or not recurse:
-            return split_string
-        else:
-            return [split_string[0],
-                    *self.parse(split_string[1],
-                    recurse=True)]
+    def _parse_tuple(self, input_string: str, recurse: bool) -> tuple:
+        """Parse a command string into a tuple, for caching."""
+        return tuple(self._parse(input_string, recurse))
+
+    def _parse(self, input_string: str, recurse: bool) -> list:
+        """Parse a command string, see parse()."""
+        if recurse:
+            args = self._parse_all(input_string)
+            return _pack_numbers(args) if self._pack_numbers else args
+
+        for arg, quoted, end in self._tokenize(input_string):
+            if not quoted:
+                arg = self._cast_chain(arg)
+            remaining = input_string[end:].lstrip()
+            return [arg, remaining] if remaining else [arg]
+        return []
+
+    def _parse_all(self, input_string: str) -> list:
+        """Parse every argument, casting runs of unquoted ones in bulk."""
+        if ('"' not in input_string and
+            "'" not in input_string and
+            '`' not in input_string
+        ):  # noqa E124
+            # Without quotes, arguments are separated by whitespace alone
+            return self._cast_many(input_string.split())
+
+        args = []
+        run = []
+        try:
+            for arg, quoted, _ in self._tokenize(input_string):
+                if not quoted:
+                    run.append(arg)
+                    continue
+                if run:
+                    args.extend(self._cast_many(run))
+                    run = []
+                args.append(arg)
+        except ValueError:
+            # Errors casting earlier arguments are raised first
+            self._cast_many(run)
+            raise
+        if run:
+            args.extend(self._cast_many(run))
+        return args
+
+    def iter_parse(self, input_string: str):
+        """Lazily parse every argument of a command string.
+
+        Equivalent to parse(input_string, recurse=True), but arguments are
+        tokenized and type cast one at a time as they are consumed, and are
+        never packed into arrays.
+
+        Args:
+            input_string (str): command string to be parsed
+
+        Yields:
+            The parsed arguments, in order.
+        """
+        type_cast = self._cast_chain
+        for arg, quoted, _ in self._tokenize(input_string):
+            yield arg if quoted else type_cast(arg)
 
 
 class DefaultCast:
@@ -95,6 +291,16 @@ class NumberCast:
             item = cls._type_cast(item)
         return item
 
+    @classmethod
+    def type_cast_many(cls, items: list) -> list:
+        """Cast a list of items, as type_cast() does each of them.
+
+        A list that is all integers is converted in a single pass.
+        """
+        if cls is NumberCast:  # Subclasses may cast differently
+            return _fast_number_cast_many(items)
+        return [cls.type_cast(item) for item in items]
+
     @staticmethod
     def _type_cast(item: str) -> Union[int, float, str]:
         """Cast item to an int or float."""
@@ -120,6 +326,14 @@ class KwargCast:
 
     kwarg_re = re.compile(r'--(\w+)=(.*)')
     identifier_re = re.compile(r'^[^\d\W]\w*\Z')
+
+    @classmethod
+    def type_cast_many(cls, items: list) -> list:
+        """Cast a list of items, as type_cast() does each of them."""
+        if cls is KwargCast:  # Subclasses may cast differently
+            return _fast_kwarg_cast_many(items)
+        return [cls.type_cast(item) for item in items]
+
     @classmethod
     def type_cast(cls, item: str) -> Kwarg:
         """Cast a string to be used as a keyword argument."""
@@ -137,3 +351,176 @@ class KwargCast:
             raise InvalidArgError(f'Keyword arg cannot be a python keyword : '
                                   f'{key}')
         return Kwarg(key, value)
+
+
+def _no_cast(item):  # noqa: ANN
+    """Return item unchanged, the cast chain of only DefaultCast."""
+    return item
+
+
+def _map_list(function: Callable, items: list) -> list:
+    """Return a list of function applied to each item."""
+    return list(map(function, items))
+
+
+def _pack_numbers(args: list) -> list:
+    """Pack the positional arguments into an array that stores them exactly."""
+    count = len(args)
+    for i, arg in enumerate(args):
+        if type(arg) is Kwarg:
+            count = i
+            break
+    if count == 0:
+        return args
+    numbers = args[:count]
+    types = set(map(type, numbers))
+    if types == {int}:
+        typecode = 'q'
+    elif types <= {int, float}:
+        typecode = 'd'
+        try:
+            # Ints beyond 2 ** 53 would be rounded
+            if not all(float(arg) == arg for arg in numbers):
+                return args
+        except OverflowError:
+            return args
+    else:
+        return args
+    try:
+        packed = array(typecode, numbers)
+    except OverflowError:
+        # Ints beyond 64 bits are passed as they are
+        return args
+    return [packed] + args[count:]
+
+
+# First characters of the strings int() or float() may accept, besides
+# decimal digits and whitespace
+_NUMBER_STARTS = frozenset('+-.iInN')
+
+
+def _fast_number_cast(item):  # noqa: ANN
+    """NumberCast.type_cast(), skipping strings that can't be numbers."""
+    if type(item) is not str:
+        if type(item) is Kwarg and type(item.value()) is str:
+            item.value(_fast_number_cast(item.value()))
+            return item
+        return NumberCast.type_cast(item)
+    if item.isdecimal():
+        return int(item)
+    first = item[:1]
+    if not (first in _NUMBER_STARTS or first.isdecimal() or
+            first.isspace()):
+        return item
+    # int() accepts no '.', so skip straight to float()
+    if '.' not in item:
+        try:
+            return int(item)
+        except ValueError:
+            pass
+    try:
+        return float(item)
+    except ValueError:
+        return item
+
+
+def _fast_number_cast_many(items: list) -> list:
+    """NumberCast.type_cast_many(), with int() mapped over the whole list."""
+    try:
+        return list(map(int, items))
+    except (TypeError, ValueError):
+        return list(map(_fast_number_cast, items))
+
+
+# Characters of ASCII python identifiers
+_IDENTIFIER_CHARS = string.ascii_letters + string.digits + '_'
+
+
+def _fast_kwarg_cast(item):  # noqa: ANN
+    """KwargCast.type_cast(), skipping strings that don't start with '--'."""
+    if type(item) is not str:
+        return KwargCast.type_cast(item)
+    if not item.startswith('--'):
+        return item
+    # The common case, an ASCII identifier key, without regular expressions
+    equals = item.find('=', 2)
+    key = item[2:equals]
+    if (equals > 2 and
+        not key.strip(_IDENTIFIER_CHARS) and
+        not key[0].isdigit() and
+        not keyword.iskeyword(key) and
+        '\n' not in item
+    ):  # noqa E124
+        return Kwarg(key, item[equals + 1:])
+    return KwargCast.type_cast(item)
+
+
+_FAST_CASTS = {NumberCast: _fast_number_cast,
+               KwargCast: _fast_kwarg_cast}
+
+
+def _fast_kwarg_cast_many(items: list) -> list:
+    """KwargCast.type_cast_many(), checking for '--' in a single pass."""
+    try:
+        if not any(map(str.startswith, items, repeat('--'))):
+            return list(items)
+    except TypeError:  # Not all strings
+        pass
+    return list(map(_fast_kwarg_cast, items))
+
+
+def _copy_mutable(result: tuple) -> tuple:
+    """Copy the Kwargs and arrays of a cached result.
+
+    Callers modifying them then don't change later results.
+    """
+    for item in result:
+        if type(item) is Kwarg or type(item) is array:
+            break
+    else:
+        return result
+    return tuple(Kwarg(item.key(), item.value()) if type(item) is Kwarg else
+                 array(item.typecode, item) if type(item) is array else item
+                 for item in result)
+
+
+class _FifoCache:
+    """A first in, first out cache of a function's results.
+
+    Has the cache_info() and cache_clear() of `functools.lru_cache`.
+    """
+
+    def __init__(self, function: Callable, maxsize: int) -> None:
+        import threading
+        self._function = function
+        self._maxsize = maxsize
+        self._results = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def __call__(self, *key):  # noqa: ANN
+        try:
+            result = self._results[key]
+        except KeyError:
+            pass
+        else:
+            self._hits += 1
+            return result
+        result = self._function(*key)
+        with self._lock:
+            self._misses += 1
+            results = self._results
+            results[key] = result
+            if len(results) > self._maxsize:
+                del results[next(iter(results))]
+        return result
+
+    def cache_info(self) -> tuple:
+        return (self._hits, self._misses, self._maxsize, len(self._results))
+
+    def cache_clear(self) -> None:
+        with self._lock:
+            self._results = {}
+            self._hits = 0
+            self._misses = 0
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""Per end-point call counts and latencies of a PromptSmartMenu.
+
+Enabled with `PromptSmartMenu.enable_metrics()`. Menus without metrics never
+import this module.
+"""
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Iterable, Tuple
+
+# Upper bounds, in seconds, of histogram buckets. A last bucket counts the
+# rest.
+DEFAULT_BUCKETS = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0)
+
+
+class Histogram:
+    """Count, total, maximum and bucketed distribution of durations."""
+
+    __slots__ = ('bounds', 'counts', 'count', 'total', 'max')
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        """Initialize with the upper bounds of the buckets, in seconds."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        """Record a duration."""
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def as_dict(self) -> dict:
+        """Return the histogram as a dict of JSON types."""
+        return {'count': self.count,
+                'total': self.total,
+                'max': self.max,
+                'bounds': list(self.bounds),
+                'counts': list(self.counts)}
+
+
+class NodeMetrics:
+    """The metrics of one end-point."""
+
+    __slots__ = ('calls', 'errors', 'parse', 'validate', 'execute')
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        """Initialize empty, with histogram bucket bounds in seconds."""
+        self.calls = 0
+        self.errors = 0
+        self.parse = Histogram(bounds)
+        self.validate = Histogram(bounds)
+        self.execute = Histogram(bounds)
+
+    def as_dict(self) -> dict:
+        """Return the metrics as a dict of JSON types."""
+        return {'calls': self.calls,
+                'errors': self.errors,
+                'parse': self.parse.as_dict(),
+                'validate': self.validate.as_dict(),
+                'execute': self.execute.as_dict()}
+
+
+class MenuMetrics:
+    """Call counts and latencies of a menu's end-points, by subcommand path.
+
+    For each end-point, records the number of calls, the number that raised,
+    and histograms of the time spent parsing arguments, validating them and
+    executing the function. For 'thread' and 'process' execution modes,
+    execution time runs from submitting the function to its future
+    completing.
+
+    Don't create this class directly. Use `PromptSmartMenu.enable_metrics()`.
+    """
+
+    def __init__(
+        self,
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+        callback: Callable[[dict], None] = None,
+        push_every: int = None
+    ) -> None:
+        """Initialize with no recorded calls.
+
+        Args:
+            buckets (Iterable[float]): Upper bounds, in seconds, of the
+                histogram buckets. Default: DEFAULT_BUCKETS
+            callback (Callable): Called with each snapshot pushed by
+                `push()`.
+            push_every (int): If set, `push()` is called automatically after
+                this many calls. Requires callback.
+        """
+        bounds = tuple(buckets)
+        if not bounds or list(bounds) != sorted(set(bounds)):
+            raise ValueError('buckets must be distinct, increasing upper '
+                             'bounds.')
+        if push_every is not None and callback is None:
+            raise ValueError('push_every requires a callback.')
+        self._bounds = bounds
+        self._callback = callback
+        self._push_every = push_every
+        self._lock = threading.Lock()
+        self._by_node = {}
+        self._by_path = {}
+        self._unpushed = 0
+
+    def _node_metrics(self, node) -> NodeMetrics:  # noqa: ANN
+        """Return the NodeMetrics of an end-point MenuNode."""
+        metrics = self._by_node.get(node)
+        if metrics is None:
+            with self._lock:
+                path = node._path()
+                metrics = self._by_path.get(path)
+                if metrics is None:
+                    metrics = self._by_path[path] = NodeMetrics(self._bounds)
+                self._by_node[node] = metrics
+        return metrics
+
+    def _prepare_args(self, node, args_str: str):  # noqa: ANN
+        """Time parsing and validating an end-point's arguments.
+
+        Returns:
+            tuple: (metrics, args, kwargs) the end-point's NodeMetrics, to
+                pass to `_executed()`, and the arguments to call it with.
+        """
+        metrics = self._node_metrics(node)
+        validate = node._settings.validate_args
+        start = perf_counter()
+        try:
+            args, kwargs = node._parse_args(args_str)
+            parsed = perf_counter()
+            if validate:
+                node._check_args(args, kwargs)
+        except Exception:  # noqa: B902, counted then re-raised
+            self._executed(metrics, None)
+            raise
+        validated = perf_counter()
+        self._prepared(metrics, parsed - start,
+                       validated - parsed if validate else None)
+        return (metrics, args, {k.key(): k.value() for k in kwargs})
+
+    def _prepared(self, metrics: NodeMetrics, parse_seconds: float,
+                  validate_seconds: float) -> None:
+        """Record the time taken to parse, and maybe validate, arguments."""
+        with self._lock:
+            metrics.parse.add(parse_seconds)
+            if validate_seconds is not None:
+                metrics.validate.add(validate_seconds)
+
+    def _executed(self, metrics: NodeMetrics, seconds: float,
+                  error: bool = False) -> None:
+        """Record a finished call, without its time if it was invalid."""
+        with self._lock:
+            metrics.calls += 1
+            if seconds is None or error:
+                metrics.errors += 1
+            if seconds is not None:
+                metrics.execute.add(seconds)
+            self._unpushed += 1
+            push = (self._push_every is not None and
+                    self._unpushed >= self._push_every)
+        if push:
+            self.push()
+
+    def snapshot(self) -> dict:
+        """Return the metrics recorded so far.
+
+        Returns:
+            dict: Maps the subcommand path of each end-point called, e.g.
+                'show ip', to a dict of 'calls', 'errors' and 'parse',
+                'validate' and 'execute' histograms. Each histogram is a
+                dict of 'count', 'total' and 'max' seconds, bucket upper
+                'bounds' and bucket 'counts', the last of which counts
+                durations over every bound.
+        """
+        with self._lock:
+            return {path: metrics.as_dict()
+                    for path, metrics in self._by_path.items()}
+
+    def reset(self) -> None:
+        """Forget all recorded metrics."""
+        with self._lock:
+            self._by_node = {}
+            self._by_path = {}
+            self._unpushed = 0
+
+    def push(self) -> dict:
+        """Pass a snapshot to the callback, then reset.
+
+        Returns:
+            dict: The snapshot pushed.
+        """
+        if self._callback is None:
+            raise ValueError('MenuMetrics has no callback to push to.')
+        with self._lock:
+            snapshot = {path: metrics.as_dict()
+                        for path, metrics in self._by_path.items()}
+            self._by_node = {}
+            self._by_path = {}
+            self._unpushed = 0
+        self._callback(snapshot)
+        return snapshot
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""Completion children of end-points fetched from a function and cached.
+
+Only imported by menus with a callable or ChildrenProvider as children.
+"""
+import threading
+from itertools import islice
+from time import monotonic, perf_counter
+from typing import Callable, Iterable, TYPE_CHECKING, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+
+
+def _wake(future: 'asyncio.Future') -> None:
+    """Resolve a future waiting for a refresh, unless it was cancelled."""
+    if not future.done():
+        future.set_result(None)
+
+
+class ChildrenProvider:
+    """Completion strings of an end-point, fetched from a function.
+
+    The strings are cached for ttl seconds. Reading them never waits for
+    the function: until the first fetch completes they are empty, and once
+    they are older than ttl the old strings are returned while a background
+    thread fetches new ones. Cached menus, such as `nested_completer_dict()`,
+    are rebuilt on the first read after the strings expire, and after each
+    `refresh()`. If the function raises, the old
+    strings are kept and the error is counted in `stats()`.
+
+    The function may be a coroutine function, in which case the background
+    thread runs it in its own event loop. An end-point given a plain function
+    as children wraps it in a ChildrenProvider with the default settings.
+    """
+
+    def __init__(
+        self,
+        function: Callable[[], Iterable[str]],
+        ttl: float = 60.0,
+        max_size: int = None
+    ) -> None:
+        """Initialize with the function returning the completion strings.
+
+        Args:
+            function (Callable): Called with no arguments, returns an
+                iterable of strings, or an awaitable of one.
+            ttl (float): Seconds before the strings are fetched again, or
+                None to fetch them only once. Default: 60.0
+            max_size (int): The most strings kept. Any more returned by
+                function are ignored. Default: no limit.
+        """
+        if not callable(function):
+            raise TypeError('ChildrenProvider function must be callable.')
+        if ttl is not None and ttl < 0:
+            raise ValueError('ttl must be non-negative, or None.')
+        if max_size is not None and max_size < 0:
+            raise ValueError('max_size must be non-negative, or None.')
+        self.function = function
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._nodes = []
+        self._words = ()
+        self._index = ((), ())
+        self._fetched = None
+        self._thread = None
+        self._waiters = []
+        self._hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._errors = 0
+        self._last_error = None
+        self._refresh_seconds = 0.0
+        self._last_refresh_seconds = None
+
+    def _watch(self, node) -> None:  # noqa: ANN
+        """Invalidate a MenuNode's cached menu data after each refresh()."""
+        self._nodes.append(node)
+
+    def _expiry(self) -> float:
+        """Return the monotonic() time the strings expire at, or None."""
+        if self._fetched is None:
+            return float('-inf')
+        if self.ttl is None:
+            return None
+        return self._fetched + self.ttl
+
+    def _stale(self) -> bool:
+        """Return true if the strings have never been fetched or expired."""
+        expiry = self._expiry()
+        return expiry is not None and monotonic() >= expiry
+
+    def words(self) -> Tuple[str, ...]:
+        """Return the cached strings, refreshing stale ones in the background.
+
+        Never blocks on the function.
+        """
+        if self._stale():
+            self._misses += 1
+            self._refresh_in_background()
+        else:
+            self._hits += 1
+        return self._words
+
+    def _completion_index(self) -> Tuple[tuple, tuple]:
+        """Return the strings sorted for bisection.
+
+        Like `MenuNode._completion_index()`.
+        """
+        self.words()
+        return self._index
+
+    async def _wait_async(self) -> None:
+        """Wait for stale strings to be refreshed in the background.
+
+        The event loop isn't blocked. Cancelling the wait doesn't cancel the
+        refresh.
+        """
+        if not self._stale():
+            return
+        import asyncio
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._refresh_in_background((loop, future))
+        await future
+
+    def _refresh_in_background(self, waiter: tuple = None) -> None:
+        """Start a thread fetching the strings, unless one is running.
+
+        waiter is an (event loop, future) pair. The future is resolved when
+        the running or started refresh finishes.
+        """
+        with self._lock:
+            if waiter is not None:
+                self._waiters.append(waiter)
+            if self._thread is not None:
+                return
+            thread = self._thread = threading.Thread(
+                target=self._refresh_and_finish, daemon=True,
+                name=f'ChildrenProvider({self.function!r})')
+        thread.start()
+
+    def _refresh_and_finish(self) -> None:
+        """Run _fetch() in the background thread, then wake waiters."""
+        try:
+            # Menus notice the new strings when they read the expired ones,
+            # so nodes aren't invalidated from this thread
+            self._fetch()
+        except Exception:  # noqa: B902, any error of the function
+            # Counted by _fetch(), the old strings are kept
+            pass
+        finally:
+            with self._lock:
+                self._thread = None
+                waiters, self._waiters = self._waiters, []
+            for loop, future in waiters:
+                try:
+                    loop.call_soon_threadsafe(_wake, future)
+                except RuntimeError:
+                    # The waiter's event loop is closed
+                    pass
+
+    def refresh(self) -> Tuple[str, ...]:
+        """Fetch the strings now, waiting for the function.
+
+        The menus using the provider are rebuilt on their next read.
+
+        Returns:
+            tuple: The new strings.
+
+        Raises:
+            Exception: Whatever the function raised. The old strings are
+                kept. A coroutine function can't be refreshed this way from
+                a running event loop, and raises RuntimeError.
+        """
+        words = self._fetch()
+        for node in self._nodes:
+            node._invalidate(revision=False)
+        return words
+
+    def _fetch(self) -> Tuple[str, ...]:
+        """Fetch and store the strings, see refresh()."""
+        start = perf_counter()
+        try:
+            words = self.function()
+            if hasattr(words, '__await__'):
+                import asyncio
+                loop = asyncio.new_event_loop()
+                try:
+                    words = loop.run_until_complete(words)
+                finally:
+                    loop.close()
+            if self.max_size is not None:
+                words = islice(words, self.max_size)
+            words = tuple(words)
+            if not all(isinstance(word, str) for word in words):
+                raise TypeError(f'{self.function!r} must return strings.')
+        except Exception as e:  # noqa: B902, counted then re-raised
+            with self._lock:
+                self._errors += 1
+                self._last_error = e
+            raise
+        finally:
+            seconds = perf_counter() - start
+            with self._lock:
+                self._refreshes += 1
+                self._refresh_seconds += seconds
+                self._last_refresh_seconds = seconds
+
+        pairs = sorted((word.lower(), word) for word in set(words))
+        index = (tuple(key for key, _ in pairs),
+                 tuple(word for _, word in pairs))
+        with self._lock:
+            self._words = words
+            self._index = index
+            self._fetched = monotonic()
+        return words
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait for a background refresh to finish, if one is running.
+
+        Returns:
+            bool: True unless the timeout expired first.
+        """
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            return not thread.is_alive()
+        return True
+
+    def stats(self) -> dict:
+        """Return cache and refresh statistics.
+
+        Returns:
+            dict: 'hits' and 'misses', reads of fresh and of stale strings,
+                'hit_rate', 'size', the number of strings, 'age' in seconds
+                since the last successful fetch or None, 'refreshes',
+                'errors', 'last_error', and 'last_refresh_seconds' and
+                'mean_refresh_seconds' for the time taken by the function.
+        """
+        with self._lock:
+            reads = self._hits + self._misses
+            return {'hits': self._hits,
+                    'misses': self._misses,
+                    'hit_rate': self._hits / reads if reads else None,
+                    'size': len(self._words),
+                    'age': (None if self._fetched is None else
+                            monotonic() - self._fetched),
+                    'refreshes': self._refreshes,
+                    'errors': self._errors,
+                    'last_error': self._last_error,
+                    'last_refresh_seconds': self._last_refresh_seconds,
+                    'mean_refresh_seconds': (
+                        self._refresh_seconds / self._refreshes
+                        if self._refreshes else None)}
@@ -1,13 +1,56 @@
 # -*- coding: utf-8 -*-
 """Build a command line menu declaratively."""
 
-from collections import OrderedDict
-from inspect import Parameter, signature
-from typing import Callable, List, Tuple, Union
+import sys
+from bisect import bisect_left
+from functools import partial
+from time import monotonic, perf_counter
+from types import MappingProxyType
+from typing import (Any, Callable, Iterable, Iterator, List, TYPE_CHECKING,
+                    Tuple, Union)
+from weakref import WeakValueDictionary
 
-from prompt_smart_menu.helpers import InvalidArgError, Kwarg, NestedDict
+from prompt_smart_menu.helpers import (ChoiceSet, InvalidArgError, Kwarg,
+                                       NestedDict)
 from prompt_smart_menu.input_parser import InputParser
 
+if TYPE_CHECKING:  # pragma: no cover
+    import asyncio
+    from concurrent.futures import Executor
+    # Only for annotations: asyncio, concurrent.futures and inspect are slow
+    # to import and only needed by some menus, so they are imported where
+    # they are used
+
+    from prompt_smart_menu.arg_validator import ArgValidator
+    from prompt_smart_menu.metrics import MenuMetrics
+    from prompt_smart_menu.providers import ChildrenProvider
+    from prompt_smart_menu.tracing import Tracer
+
+
+EXECUTION_MODES = ('inline', 'thread', 'process')
+
+# Shared by all end-points, which can't have children nodes
+_NO_CHILDREN = MappingProxyType({})
+
+# The most candidates listed by an ambiguous subcommand error
+_MAX_CANDIDATES = 10
+
+# The most suggestions listed by a subcommand not found error
+_MAX_SUGGESTIONS = 5
+
+
+class _NoLimit:
+    """Stand-in for an asyncio.Semaphore that never blocks."""
+
+    async def __aenter__(self) -> None:
+        pass
+
+    async def __aexit__(self, *exc_info) -> None:  # noqa: ANN002
+        pass
+
+
+_NO_LIMIT = _NoLimit()
+
 
 def is_list_of_strings(li: list) -> bool:
     """Return true if input is a list of strings."""
@@ -24,19 +67,98 @@ def is_list_of_kwargs(li: list) -> bool:
     return all(isinstance(elem, Kwarg) for elem in li)
 
 
+class _NodeSettings:
+    """The settings of a MenuNode, shared by every node with the same ones.
+
+    See _node_settings().
+    """
+
+    __slots__ = ('parser', 'validate_args', 'stream_args', 'execution',
+                 'lazy', 'prefix_match', 'fuzzy_match', 'validate_choices',
+                 '__weakref__')
+
+    def __init__(
+        self,
+        parser: InputParser,
+        validate_args: bool,
+        stream_args: bool,
+        execution: str,
+        lazy: bool,
+        prefix_match: bool,
+        fuzzy_match: bool,
+        validate_choices: bool
+    ) -> None:
+        """Initialize with a MenuNode's settings, see MenuNode.__init__."""
+        self.parser = parser
+        self.validate_args = validate_args
+        self.stream_args = stream_args
+        self.execution = execution
+        self.lazy = lazy
+        self.prefix_match = prefix_match
+        self.fuzzy_match = fuzzy_match
+        self.validate_choices = validate_choices
+
+
+# The _NodeSettings in use, by their values. Parsers are keyed by id, as
+# they need not be hashable, and kept alive by the _NodeSettings using them.
+_SETTINGS = WeakValueDictionary()
+
+
+def _node_settings(
+    parser: InputParser,
+    validate_args: bool,
+    stream_args: bool,
+    execution: str,
+    lazy: bool,
+    prefix_match: bool,
+    fuzzy_match: bool,
+    validate_choices: bool
+) -> _NodeSettings:
+    """Return the _NodeSettings with these values, creating it if needed."""
+    key = (id(parser), validate_args, stream_args, execution, lazy,
+           prefix_match, fuzzy_match, validate_choices)
+    settings = _SETTINGS.get(key)
+    if settings is None:
+        settings = _SETTINGS[key] = _NodeSettings(
+            parser, validate_args, stream_args, execution, lazy,
+            prefix_match, fuzzy_match, validate_choices)
+    return settings
+
+
 class MenuNode:
     """The MenuNode class for PromptSmartMenu sub/commands.
 
     Don't use this class directly. Initialize with PromptSmartMenu.
+
+    A MenuNode is created as a _BranchNode if it has children nodes, or an
+    _EndPointNode if it has a function, so that each only stores what its
+    kind uses. Settings are stored in a shared _NodeSettings.
     """
 
+    __slots__ = ('_command', '_function', '_children', '_settings',
+                 '_parent', '_menu', '_words')
+
+    def __new__(cls, **kwargs) -> 'MenuNode':  # noqa: ANN003
+        """Create a _BranchNode or an _EndPointNode, see __init__."""
+        if cls is MenuNode:
+            cls = _EndPointNode if kwargs.get('function') else _BranchNode
+        return object.__new__(cls)
+
     def __init__(
         self, *,
         command: str,
         function: Callable = None,
-        children: Union[List[dict], List[str], NestedDict] = None,
+        children: Union[List[dict], List[str], NestedDict, Callable,
+                        'ChildrenProvider'] = None,
         parser: InputParser = InputParser(),
-        validate_args: bool = False
+        validate_args: bool = False,
+        stream_args: bool = False,
+        execution: str = 'inline',
+        lazy: bool = False,
+        aliases: List[str] = None,
+        prefix_match: bool = False,
+        fuzzy_match: bool = False,
+        validate_choices: bool = False
     ) -> None:
         """Initialize by unpacking menu node dict.
 
@@ -53,8 +175,49 @@ class MenuNode:
             validate_args (bool): If true and has function, function arguments
                 are checked for validity before calling function. Defaults to
                 parent node's setting.
+            stream_args (bool): If true, function is called with a single
+                iterator that lazily parses the arguments, instead of the
+                parsed arguments themselves. Not inherited. Default: False
+            execution (str): Where function runs: 'inline', 'thread' for the
+                menu's thread pool or 'process' for its process pool. Defaults
+                to parent node's setting.
+            lazy (bool): If true, children nodes are only validated and built
+                when first needed. Defaults to parent node's setting.
+            aliases (List[str]): Other subcommands that lead to this node.
+                Not inherited.
+            prefix_match (bool): If true, children nodes can also be reached
+                by any prefix of their command or aliases that only one of
+                them starts with. Defaults to parent node's setting.
+            fuzzy_match (bool): If true, a subcommand that isn't found is
+                taken to mean the only child whose command or alias is
+                closest to it, within one typo. Defaults to parent node's
+                setting.
+            validate_choices (bool): If true and children is a list of
+                strings, positional arguments must be among them, as typed
+                before any cast. Defaults to parent node's setting.
         """
+        provider = None
+        if (children is not None and
+            not isinstance(children, (list, tuple, NestedDict))
+        ):  # noqa E124
+            # Only menus with providers import the module
+            from prompt_smart_menu.providers import ChildrenProvider
+            if isinstance(children, ChildrenProvider):
+                provider = children
+            elif callable(children):
+                provider = ChildrenProvider(children)
+            else:
+                raise TypeError(f"Children of '{command}' are "
+                                f"not an excepted type.")
+
+        # Lazy children are checked by _index_pending() when first needed
+        deferred = (lazy and not function and
+                    isinstance(children, list) and
+                    len(children) > 0 and
+                    isinstance(children[0], dict))
         if (children and
+            not deferred and
+            provider is None and
             not isinstance(children, NestedDict) and
             not is_list_of_dicts(children) and
             not is_list_of_strings(children)
@@ -62,82 +225,558 @@ class MenuNode:
             raise TypeError(f"Children of '{command}' are "
                             f"not an excepted type.")
 
-        self._command = command
+        if not isinstance(command, str):
+            raise TypeError("MenuNode command must be a "
+                            f"string. See '{command}'.")
+
+        # Commands are interned, as many menus repeat the same subcommands
+        self._command = sys.intern(command)
         self._function = function
-        self._children = []
-        self._parser = parser
-        self._parse = parser.parse
-        self._validate_args = validate_args
+        self._children = ()
+        self._settings = _node_settings(
+            parser, validate_args, stream_args, execution, lazy,
+            prefix_match, fuzzy_match, validate_choices)
+        self._parent = None
+        self._menu = None
+        self._words = None
+        # A parent indexes its children's aliases, see _index_child()
+        self._check_aliases(command, aliases)
 
         if function and not isinstance(function, Callable):
-            raise TypeError(f"{self.__class__.__name__} function must be"
+            raise TypeError("MenuNode function must be"
                             f" callable. See '{command}'.")
 
+        if stream_args and not function:
+            raise TypeError("MenuNode without a function "
+                            f"cannot stream arguments. See '{command}'.")
+
+        if execution not in EXECUTION_MODES:
+            raise ValueError("MenuNode execution must be "
+                             f"one of {EXECUTION_MODES}. See '{command}'.")
+
+        if function and execution == 'process':
+            if stream_args:
+                raise TypeError("MenuNode cannot stream "
+                                f"arguments to another process. "
+                                f"See '{command}'.")
+            import pickle
+            try:
+                pickle.dumps(function)
+            except (pickle.PicklingError, AttributeError, TypeError) as e:
+                raise TypeError("MenuNode function must be "
+                                f"picklable to run in a process pool. "
+                                f"See '{command}'.") from e
+
         if function:
             if (children and
+                provider is None and
                 not isinstance(children, NestedDict) and
                 isinstance(children[0], dict)
             ):  # noqa E124
-                raise TypeError(f"{self.__class__.__name__} cannot have a"
+                raise TypeError("MenuNode cannot have a"
                                 f" function and children nodes. "
                                 f"See '{command}'.")
-            self._children = children
+            self._validator = None
+            self._choices = None
+            if provider is not None:
+                self._children = provider
+                provider._watch(self)
+            elif isinstance(children, list):
+                self._children = tuple(children)
+            elif children:
+                self._children = children
+            if (validate_choices and
+                type(self._children) is tuple and
+                self._children
+            ):  # noqa E124
+                self._choices = ChoiceSet(self._children)
         else:
             if (children is None or
+                provider is not None or
                 isinstance(children, NestedDict) or
                 is_list_of_strings(children)
             ):  # noqa E124
-                raise TypeError(f"{self.__class__.__name__} without a function"
-                                f"require {self.__class__.__name__} as "
+                raise TypeError("MenuNode without a function"
+                                f"require MenuNode as "
                                 f"children nodes. See '{command}'.")
 
-            child_commands = set()
+            self._child_index = {}
+            self._alias_index = _NO_CHILDREN
+            self._pending = None
+            self._materialized = True
+            self._prefixes = None
+            self._fuzzy = None
+            self._revision = 0
+            self._expires = None
+            if deferred:
+                self._pending = children
+                self._materialized = False
+            else:
+                for child in children:
+                    self._index_child(self._build_child(child),
+                                      child.get('aliases'))
+                self._children = tuple(self._child_index.values())
+
+    @staticmethod
+    def _restore(
+        command: str,
+        function: Callable,
+        children: Union[tuple, NestedDict, 'ChildrenProvider'],
+        parser: InputParser,
+        validate_args: bool,
+        stream_args: bool,
+        execution: str,
+        alias_index: dict,
+        prefix_match: bool,
+        fuzzy_match: bool,
+        validate_choices: bool
+    ) -> 'MenuNode':
+        """Build a MenuNode from values that have already been validated.
+
+        Used to load snapshots. Unlike __init__, nothing is checked. children
+        is a tuple of MenuNodes or strings, a NestedDict or a
+        ChildrenProvider. alias_index maps the aliases of children nodes to
+        their commands.
+        """
+        node = object.__new__(_EndPointNode if function else _BranchNode)
+        node._command = sys.intern(command)
+        node._function = function
+        node._children = children
+        node._settings = _node_settings(
+            parser, validate_args, stream_args, execution, False,
+            prefix_match, fuzzy_match, validate_choices)
+        node._parent = None
+        node._menu = None
+        node._words = None
+        if function:
+            node._validator = None
+            node._choices = None
+            if not isinstance(children, (tuple, NestedDict)):
+                children._watch(node)
+            elif validate_choices and type(children) is tuple and children:
+                node._choices = ChoiceSet(children)
+        else:
+            node._child_index = {}
+            node._alias_index = alias_index or _NO_CHILDREN
+            node._pending = None
+            node._materialized = True
+            node._prefixes = None
+            node._fuzzy = None
+            node._revision = 0
+            node._expires = None
             for child in children:
-                if 'parser' not in child:
-                    child['parser'] = self._parser
-                if 'validate_args' not in child:
-                    child['validate_args'] = self._validate_args
-                self._children.append(MenuNode(**child))
-                if child['command'] in child_commands:
-                    raise TypeError(f"Multiple children node of '{command}' "
-                                    f"share the same command: "
-                                    f"{child['command']}")
-                child_commands.add(child['command'])
+                child._parent = node
+                node._child_index[child._command] = child
+        return node
+
+    @staticmethod
+    def _check_aliases(command: str, aliases: List[str]) -> tuple:
+        """Return a menu node dict's aliases as interned strings."""
+        if not aliases:
+            return ()
+        if (not isinstance(aliases, (list, tuple)) or
+            not is_list_of_strings(aliases)
+        ):  # noqa E124
+            raise TypeError(f"Aliases of '{command}' must be a list of "
+                            f"strings.")
+        return tuple(sys.intern(alias) for alias in aliases)
+
+    def add_child(self, child: dict) -> None:
+        """Build a child MenuNode from a menu node dict and attach it.
+
+        Args:
+            child (dict): A menu node dict. See documentation.
+
+        Raises:
+            TypeError: If this MenuNode is an end-point, or a child with the
+                same command or alias already exists.
+        """
+        if self._function:
+            raise TypeError("MenuNode cannot have a"
+                            f" function and children nodes. "
+                            f"See '{self._command}'.")
+        self._materialize_children()
+        node = self._build_child(child)
+        self._index_child(node, child.get('aliases'))
+        self._children += (node,)
+        self._invalidate()
+
+    def _index_child(self, node: 'MenuNode', aliases: List[str]) -> None:
+        """Add a child MenuNode to the command and alias indexes."""
+        aliases = self._check_aliases(node._command, aliases)
+        if aliases and self._alias_index is _NO_CHILDREN:
+            self._alias_index = {}
+        self._index_names(node._command, aliases, self._child_index,
+                          self._alias_index)
+        self._child_index[node._command] = node
+
+    def _index_names(
+        self,
+        command: str,
+        aliases: tuple,
+        child_index: dict,
+        alias_index: dict
+    ) -> None:
+        """Check a child's command and aliases are unique, index aliases."""
+        seen = set()
+        for name in (command,) + aliases:
+            if (name in seen or
+                name in child_index or
+                name in alias_index
+            ):  # noqa E124
+                raise TypeError(f"Multiple children node of "
+                                f"'{self._command}' share the same "
+                                f"command: {name}")
+            seen.add(name)
+        for alias in aliases:
+            alias_index[alias] = command
+
+    def _build_child(self, child: dict) -> 'MenuNode':
+        """Build a child MenuNode, inheriting this MenuNode's settings."""
+        settings = self._settings
+        node = MenuNode(**{'parser': settings.parser,
+                           'validate_args': settings.validate_args,
+                           'execution': settings.execution,
+                           'lazy': settings.lazy,
+                           'prefix_match': settings.prefix_match,
+                           'fuzzy_match': settings.fuzzy_match,
+                           'validate_choices': settings.validate_choices,
+                           **child})
+        node._parent = self
+        return node
+
+    def _index_pending(self) -> None:
+        """Index the menu node dicts of lazy children by command.
+
+        The dicts are checked for type and duplicate commands, but are not
+        built into MenuNodes. The indexes are only stored once every dict
+        has been checked, so an invalid dict raises on every access.
+        """
+        child_index = {}
+        alias_index = {}
+        for child in self._pending:
+            if not isinstance(child, dict):
+                raise TypeError(f"Children of '{self._command}' are "
+                                f"not an excepted type.")
+            if 'command' not in child:
+                raise TypeError(f"Children of '{self._command}' require a "
+                                f"command.")
+            self._index_names(child['command'], self._check_aliases(
+                child['command'], child.get('aliases')), child_index,
+                alias_index)
+            child_index[child['command']] = child
+        self._child_index = child_index
+        self._alias_index = alias_index or _NO_CHILDREN
+        self._pending = None
+
+    def _get_child(self, command: str) -> 'MenuNode':
+        """Return the child MenuNode for a subcommand or alias, or None.
+
+        A lazy child is built on first access.
+        """
+        if self._materialized:
+            child = self._child_index.get(command)
+        else:
+            if self._pending is not None:
+                self._index_pending()
+            child = self._child_index.get(command)
+            if type(child) is dict:
+                child = self._child_index[command] = self._build_child(child)
+        if child is None and self._alias_index:
+            command = self._alias_index.get(command)
+            if command is not None:
+                return self._get_child(command)
+        return child
+
+    def _match_prefix(self, prefix: str) -> 'MenuNode':
+        """Return the only child MenuNode whose name starts with prefix.
+
+        Returns None if there is none. The commands and aliases are kept
+        sorted, so the ones starting with prefix are found by bisection,
+        whatever the number of children.
+
+        Raises:
+            InvalidArgError: If more than one child starts with prefix. The
+                message lists some of them.
+        """
+        if not prefix:
+            return None
+        names = self._prefixes
+        if names is None:
+            if self._pending is not None:
+                self._index_pending()
+            names = self._prefixes = tuple(
+                sorted(list(self._child_index) + list(self._alias_index)))
+        start = bisect_left(names, prefix)
+        last = ord(prefix[-1])
+        stop = (bisect_left(names, prefix[:-1] + chr(last + 1), start)
+                if last < sys.maxunicode else len(names))
+
+        # A command and its aliases may all start with prefix
+        commands = []
+        for i in range(start, stop):
+            command = self._alias_index.get(names[i], names[i])
+            if command not in commands:
+                commands.append(command)
+                if len(commands) > _MAX_CANDIDATES:
+                    break
+        if not commands:
+            return None
+        if len(commands) == 1:
+            return self._get_child(commands[0])
+        candidates = ', '.join(sorted(commands[:_MAX_CANDIDATES]))
+        if len(commands) > _MAX_CANDIDATES:
+            candidates += ', ...'
+        e = ValueError(f'Ambiguous subcommand: {prefix}. '
+                       f'Candidates: {candidates}')
+        raise InvalidArgError(e)
+
+    def _suggest(self, word: str) -> List[Tuple[int, str]]:
+        """Return the children within one typo of a word, closest first.
+
+        Children are matched by command or alias. Their index is built on
+        first use, in a single pass over them.
+
+        Returns:
+            list: (distance, command) pairs.
+        """
+        index = self._fuzzy
+        if index is None:
+            from prompt_smart_menu.fuzzy import EditIndex
+            words = list(self._child_index)
+            words.extend(self._alias_index)
+            index = self._fuzzy = EditIndex(words)
+        suggestions = []
+        seen = set()
+        for d, word in index.lookup(word):
+            word = self._alias_index.get(word, word)
+            if word not in seen:
+                seen.add(word)
+                suggestions.append((d, word))
+        return suggestions
+
+    def _not_found(self, command: Any) -> 'MenuNode':
+        """Handle a subcommand that matches no child.
+
+        With fuzzy_match, returns the child closest to command, if there is
+        only one.
+
+        Raises:
+            InvalidArgError: Subcommand not found, suggesting the children
+                within one typo of command.
+        """
+        suggestions = (self._suggest(command)
+                       if isinstance(command, str) else [])
+        if (self._settings.fuzzy_match and
+            suggestions and
+            (len(suggestions) == 1 or
+             suggestions[0][0] < suggestions[1][0])
+        ):  # noqa E124
+            return self._get_child(suggestions[0][1])
+        message = f'Subcommand not found: {command}'
+        if suggestions:
+            message += '. Did you mean: {}?'.format(', '.join(
+                word for _, word in suggestions[:_MAX_SUGGESTIONS]))
+        raise InvalidArgError(ValueError(message))
+
+    def _materialize_children(self) -> None:
+        """Build any lazy children of this MenuNode, not their children."""
+        if self._materialized:
+            return
+        if self._pending is not None:
+            self._index_pending()
+        for command, child in self._child_index.items():
+            if type(child) is dict:
+                self._child_index[command] = self._build_child(child)
+        self._children = tuple(self._child_index.values())
+        self._materialized = True
+
+    def materialize(self) -> None:
+        """Build and validate every lazy MenuNode below this one."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if not node._function:
+                node._materialize_children()
+                stack.extend(node._children)
+
+    def remove_child(self, command: str) -> None:
+        """Detach the child MenuNode for a subcommand.
+
+        Args:
+            command (str): The subcommand to remove.
+
+        Raises:
+            KeyError: If no child has this command.
+            ValueError: If this is the only remaining child.
+        """
+        self._materialize_children()
+        node = self._child_index[command]
+        if len(self._children) == 1:
+            raise ValueError(f"Cannot remove the last child of "
+                             f"'{self._command}'.")
+        del self._child_index[command]
+        for alias in self._aliases_of(command):
+            del self._alias_index[alias]
+        self._children = tuple(child for child in self._children
+                               if child is not node)
+        node._parent = None
+        self._invalidate()
+
+    def _aliases_of(self, command: str) -> List[str]:
+        """Return the aliases of a child MenuNode."""
+        return [alias for alias, aliased in self._alias_index.items()
+                if aliased == command]
+
+    def _path(self) -> str:
+        """Return the subcommands leading to this MenuNode, space separated."""
+        commands = []
+        node = self
+        while node._parent is not None:
+            commands.append(node._command)
+            node = node._parent
+        return ' '.join(reversed(commands))
+
+    def _invalidate(self, revision: bool = True) -> None:
+        """Clear cached menu data of this MenuNode and its ancestors.
+
+        Also bumps the revision of the root node, so that compiled dispatch
+        tables of the menu know they are out of date, unless revision is
+        false because only completion children changed.
+        """
+        node = self
+        self._clear_caches()
+        while True:
+            node._menu = None
+            if node._parent is None:
+                if revision:
+                    node._revision += 1
+                return
+            node = node._parent
+
+    def _clear_caches(self) -> None:
+        """Clear the lookup structures built from this node's children."""
+        self._words = None
 
     @staticmethod
     def _split_kwargs(args: list) -> Tuple[list, List[Kwarg]]:
         """Separate Kwargs from arguments."""
-        try:
-            kwarg_index = list(map(lambda a: isinstance(a, Kwarg), args)
-                               ).index(True)
-            kwargs = [*args[kwarg_index:]]
-            if not is_list_of_kwargs(kwargs):
-                raise SyntaxError(f'positional argument follows keyword '
-                                  f'argument: {kwargs[0]}')
-            return ([*args[:kwarg_index]], kwargs)
-        except ValueError:
-            return ([*args], [])
+        for kwarg_index, arg in enumerate(args):
+            if isinstance(arg, Kwarg):
+                break
+        else:
+            return (list(args), [])
+        kwargs = args[kwarg_index:]
+        if not is_list_of_kwargs(kwargs):
+            raise SyntaxError(f'positional argument follows keyword '
+                              f'argument: {kwargs[0]}')
+        return (args[:kwarg_index], kwargs)
 
     def get_menu(self) -> dict:
-        """Recursively build menu for auto-completion."""
+        """Recursively build menu for auto-completion.
+
+        The menu is cached, and only rebuilt after children are added to or
+        removed from this MenuNode or one of its descendants, or once the
+        strings of a ChildrenProvider below it expire. The returned dict is
+        shared and should not be modified.
+        """
+        if self._menu is not None:
+            expires = self._menu_expiry()
+            if expires is None or monotonic() < expires:
+                return self._menu
+
+        self._materialize_children()
         if not self._children:
             value = None
         elif isinstance(self._children, NestedDict):
             value = self._children.nest
+        elif not isinstance(self._children, tuple):
+            # Not cached, the provider's strings are checked on each read
+            return {self._command: set(self._children.words())}
         elif isinstance(self._children[0], str):
-            value = set(self._children)
+            value = self._choice_set()
         elif isinstance(self._children[0], MenuNode):
             value = {}
+            expires = None
             for child in self._children:
-                value = {**child.get_menu(), **value}
+                value[child._command] = child.get_menu()[child._command]
+                child_expires = child._menu_expiry()
+                if (child_expires is not None and
+                    (expires is None or child_expires < expires)
+                ):  # noqa E124
+                    expires = child_expires
+            self._expires = expires
+
+        self._menu = {self._command: value}
+        return self._menu
 
-        return {self._command: value}
+    def _menu_expiry(self) -> float:
+        """Return the monotonic() time the cached menu expires at, or None."""
+        if (self._function and
+            not isinstance(self._children, (tuple, NestedDict))
+        ):  # noqa E124
+            return self._children._expiry()
+        return None
+
+    def _completion_index(self) -> Tuple[tuple, tuple]:
+        """Return the words this MenuNode completes, sorted for bisection.
+
+        Returns:
+            tuple: (keys, words) where words are the child commands or strings
+                ordered by their lowercase form, and keys are those lowercase
+                forms. NestedDict children are not included.
+        """
+        if (self._function and
+            not isinstance(self._children, (tuple, NestedDict))
+        ):  # noqa E124
+            # A ChildrenProvider sorts its strings when it fetches them
+            return self._children._completion_index()
+        if self._words is None:
+            if not self._function:
+                if self._pending is not None:
+                    self._index_pending()
+                words = self._child_index
+            elif not self._children or isinstance(self._children, NestedDict):
+                words = ()
+            else:
+                words = self._choice_set()
+            pairs = sorted((word.lower(), word) for word in words)
+            self._words = (tuple(key for key, _ in pairs),
+                           tuple(word for _, word in pairs))
+        return self._words
+
+    def _choice_set(self) -> ChoiceSet:
+        """Return the string children of an end-point as a ChoiceSet.
+
+        With validate_choices, the set is built with the node and shared by
+        completion and argument validation.
+        """
+        if self._choices is not None:
+            return self._choices
+        return ChoiceSet(self._children)
+
+    def _check_choices(self, args_str: str, args: list, kwargs: list) -> None:
+        """Check positional arguments are among the end-point's strings.
+
+        With an InputParser, the arguments are checked as typed, before they
+        are cast, so neither '01' cast to 1 nor numbers packed into an array
+        are rejected. The arguments of other parsers are checked as parsed.
+        """
+        choices = self._choices
+        if isinstance(self._settings.parser, InputParser):
+            args = [arg for arg, _, _ in InputParser._tokenize(args_str)]
+            if kwargs:
+                del args[-len(kwargs):]
+        for arg in args:
+            if type(arg) is not str or arg not in choices:
+                raise InvalidArgError(ValueError(f'Invalid choice: {arg}'))
 
     def process_arg(self, args_str: str):
         """Parse an argument from a command string and process appropriately.
 
         If this MenuNode has a function, the entire command string is parsed
-        and sent to the function as arguments. Otherwise, a single argument is
+        and sent to the function as arguments, or as a single lazy iterator if
+        stream_args=True. Otherwise, a single argument is
         parsed and the remaining command string is sent to the appropriate
         child MenuNode, if it exists.
 
@@ -150,128 +789,128 @@ class MenuNode:
                 and given a non-existent subcommand. If validate_args=True and
                 arguments are invalid.
         """
-        if self._function:
-            args = self._parse(args_str, recurse=True)
-            if(self._validate_args):
-                self._validate_function_args(args)
-            args, kwargs = self._split_kwargs(args)
-            kwargs = {k.key(): k.value() for k in kwargs}
-            return self._function(*args, **kwargs)
-        elif args_str.strip() == '':
-            e = ValueError('More arguments needed.')
-            raise InvalidArgError(e)
-        else:
-            command, *args = self._parse(args_str)
-            if args == []:
-                args = ''
-            else:
-                args = args[0]
+        node, args_str = self._resolve(args_str)
+        args, kwargs = node._prepare_args(args_str)
+        return node._function(*args, **kwargs)
 
-            for child in self._children:
-                if child._command == command:
-                    return child.process_arg(args)
-            # This is if no valid child command is found
-            e = ValueError('Subcommand not found: {command}')
-            raise InvalidArgError(e)
+    def _resolve(
+        self,
+        args_str: str,
+        tracer: 'Tracer' = None
+    ) -> Tuple['MenuNode', str]:
+        """Follow the subcommands of a command string to an end-point.
+
+        Each subcommand is parsed with the parser of the MenuNode it belongs
+        to. If a tracer is given, its hooks are called around each parse.
+
+        Returns:
+            tuple: (node, args_str) the end-point MenuNode and the remaining,
+                unparsed, command string for its arguments.
+
+        Raises:
+            InvalidArgError: If a MenuNode that is not an end-point is given
+                no commands, a non-existent subcommand, or an ambiguous
+                prefix of subcommands.
+        """
+        node = self
+        while not node._function:
+            if args_str.strip() == '':
+                e = ValueError('More arguments needed.')
+                raise InvalidArgError(e)
+            parser = node._settings.parser
+            if tracer is not None:
+                from prompt_smart_menu.tracing import traced_parser
+                parser = traced_parser(parser, tracer)
+            command, *args = parser.parse(args_str)
+            args_str = args[0] if args else ''
+
+            child = (node._get_child(command)
+                     if isinstance(command, str) else None)
+            if child is None and node._settings.prefix_match:
+                child = (node._match_prefix(command)
+                         if isinstance(command, str) else None)
+            if child is None:
+                # This is if no valid child command is found
+                child = node._not_found(command)
+            node = child
+        return (node, args_str)
+
+    def _prepare_args(self, args_str: str) -> Tuple[list, dict]:
+        """Parse an end-point's arguments, validating them if enabled.
+
+        Returns:
+            tuple: (args, kwargs) to call the function with.
+        """
+        args, kwargs = self._parse_args(args_str)
+        if self._settings.validate_args:
+            self._check_args(args, kwargs)
+        return (args, {k.key(): k.value() for k in kwargs})
+
+    def _parse_args(
+        self,
+        args_str: str,
+        parser: InputParser = None
+    ) -> Tuple[list, List[Kwarg]]:
+        """Parse an end-point's arguments into positional args and Kwargs.
+
+        With stream_args, the only positional argument is the lazy iterator.
+        Otherwise, with validate_choices, positional arguments are checked
+        against string children. parser overrides this MenuNode's parser.
+        """
+        if parser is None:
+            parser = self._settings.parser
+        if self._settings.stream_args:
+            return ([parser.iter_parse(args_str)], [])
+        args, kwargs = self._split_kwargs(parser.parse(args_str, recurse=True))
+        if self._choices is not None:
+            self._check_choices(args_str, args, kwargs)
+        return (args, kwargs)
+
+    def _check_args(self, args: list, kwargs: List[Kwarg]) -> None:
+        """Validate parsed arguments against the function's signature."""
+        self._get_validator().validate(args, kwargs)
+
+    def _get_validator(self) -> 'ArgValidator':
+        """Return the ArgValidator for function, compiling it if needed."""
+        validator = self._validator
+        if validator is None or validator.function is not self._function:
+            from prompt_smart_menu.arg_validator import ArgValidator
+            validator = self._validator = ArgValidator(self._function)
+        return validator
 
     def _validate_function_args(self, args: list) -> None:
         """Validate a function's arguments before calling it."""
         args, kwargs = self._split_kwargs(args)
+        self._get_validator().validate(args, kwargs)
 
-        sig = signature(self._function)
-        parameters = OrderedDict()
-        for k, v in sig.parameters.items():
-            parameters[k] = [v, False]
-
-        var_positional = False
-        var_keyword = False
-
-        remove_list = []
-        # Remove *args and **kwargs from parameters and represent as bool
-        for p in parameters:
-            if parameters[p][0].kind == Parameter.VAR_POSITIONAL:
-                var_positional = True
-                remove_list.append(p)
-            elif parameters[p][0].kind == Parameter.VAR_KEYWORD:
-                var_keyword = True
-                remove_list.append(p)
-        for p in remove_list:
-            parameters.pop(p)
-
-        # Process kwargs
-        extra_kwargs = {}
-        for kwarg in kwargs:
-            keyword = kwarg.key()
-            if keyword in parameters:
-                if parameters[keyword][1]:
-                    e = SyntaxError(f'keyword argument repeated: {keyword}')
-                    raise InvalidArgError(e)
-                if parameters[keyword][0].kind == Parameter.POSITIONAL_ONLY:
-                    e = TypeError(f"{self._function.__name__}() got some "
-                                  f"positional-only arguments passed as "
-                                  f"keyword arguments: '{keyword}'")
-                    raise InvalidArgError(e)
-                parameters[keyword][1] = True
-            elif var_keyword:
-                if keyword in extra_kwargs:
-                    e = TypeError(f"{self._function.__name__}() got an "
-                                  f"unexpected keyword argument '{keyword}'")
-                    raise InvalidArgError(e)
-                extra_kwargs[keyword] = keyword
-            else:
-                e = TypeError(f"{self._function.__name__}() got an "
-                              f"unexpected keyword argument '{keyword}'")
-                raise InvalidArgError(e)
 
-        # Process args
-        number_args = len(args)
-        for p in parameters:
-            if number_args <= 0:
-                break
-            if parameters[p][0].kind >= Parameter.KEYWORD_ONLY:
-                break
-            if parameters[p][1]:
-                e = TypeError(f"{self._function.__name__}() got multiple "
-                              f"values for argument 'p'")
-                raise InvalidArgError(e)
-            parameters[p][1] = True
-            number_args -= 1
-
-        # Extra positional arguments
-        if number_args > 0 and not var_positional:
-            e = TypeError(f"{self._function.__name__}() takes "
-                          f"{len(parameters)} positional argument but "
-                          f"{len(args)} were given")
-            raise InvalidArgError(e)
-
-        # Required params missing
-        missing_positional = []
-        missing_keyword_only = []
-        for p in parameters:
-            if (not parameters[p][1] and
-                isinstance(parameters[p][0].default, type)
-            ):  # noqa E124
-                if parameters[p][0].kind < Parameter.KEYWORD_ONLY:
-                    missing_positional.append(p)
-                else:
-                    missing_keyword_only.append(p)
+class _BranchNode(MenuNode):
+    """A MenuNode with children nodes, and the indexes used to find them."""
+
+    __slots__ = ('_child_index', '_alias_index', '_pending', '_materialized',
+                 '_prefixes', '_fuzzy', '_revision', '_expires')
+
+    def _clear_caches(self) -> None:
+        """Clear the lookup structures built from this node's children."""
+        self._words = None
+        self._prefixes = None
+        self._fuzzy = None
+
+    def _menu_expiry(self) -> float:
+        """Return the earliest expiry of the children's menus, or None."""
+        return self._expires
 
-        if missing_positional:
-            e = TypeError(f"{self._function.__name__}() missing "
-                          f"{len(missing_positional)} required arguments: "
-                          f"{missing_positional}")
-            raise InvalidArgError(e)
 
-        if missing_keyword_only:
-            e = TypeError(f"{self._function.__name__}() missing "
-                          f"{len(missing_keyword_only)} required arguments: "
-                          f"{missing_keyword_only}")
-            raise InvalidArgError(e)
+class _EndPointNode(MenuNode):
+    """A MenuNode with a function, and the structures to check arguments."""
 
-        # def _help(self):
-        #     sig = signature(self._function)
-        #     if len(sig.parameters) != len(args):
-        #         pass
+    __slots__ = ('_validator', '_choices')
+
+    # End-points have no children nodes to index, these are only read
+    _child_index = _NO_CHILDREN
+    _alias_index = _NO_CHILDREN
+    _pending = None
+    _materialized = True
 
 
 class PromptSmartMenu:
@@ -286,7 +925,15 @@ class PromptSmartMenu:
         self,
         menu_config: List[dict],
         parser: InputParser = InputParser(),
-        validate_args: bool = False
+        validate_args: bool = False,
+        executor: 'Executor' = None,
+        max_concurrency: int = None,
+        execution: str = 'inline',
+        max_workers: int = None,
+        lazy: bool = False,
+        prefix_match: bool = False,
+        fuzzy_match: bool = False,
+        validate_choices: bool = False
     ) -> None:
         """Initialize with menu configuration.
 
@@ -299,6 +946,30 @@ class PromptSmartMenu:
                 Default: InputParser that treats all arguments as strings.
             validate_args: (bool): If true, arguments are validated before
                 calling an end-point function. Default: False
+            executor (Executor): Where `run_async()` runs end-point functions
+                that are not coroutine functions. Default: the event loop's
+                default executor.
+            max_concurrency (int): The most commands `run_async()` runs at
+                once. Others wait for one to finish. Default: no limit.
+            execution (str): Where end-point functions run: 'inline',
+                'thread' or 'process'. Inherited by child nodes, unless
+                overwritten. Default: 'inline'
+            max_workers (int): Size of the menu's thread and process pools.
+                Default: chosen by concurrent.futures.
+            lazy (bool): If true, menu nodes are only validated and built the
+                first time a command or completion reaches them. See
+                `materialize()` and `validate_all()`. Default: False
+            prefix_match (bool): If true, subcommands can be abbreviated to
+                any prefix that only one of their siblings' commands or
+                aliases starts with. Inherited by child nodes, unless
+                overwritten. Default: False
+            fuzzy_match (bool): If true, a mistyped subcommand runs the only
+                subcommand within one typo of it. Inherited by child nodes,
+                unless overwritten. Default: False
+            validate_choices (bool): If true, the positional arguments of
+                end-points with a list of strings as children must be among
+                them. Inherited by child nodes, unless overwritten.
+                Default: False
         """
         if not is_list_of_dicts(menu_config):
             raise TypeError("menu_config takes a list of dictionaries.")
@@ -308,13 +979,472 @@ class PromptSmartMenu:
                 'function': None,
                 'children': menu_config,
                 'parser': parser,
-                'validate_args': validate_args}
+                'validate_args': validate_args,
+                'execution': execution,
+                'lazy': lazy,
+                'prefix_match': prefix_match,
+                'fuzzy_match': fuzzy_match,
+                'validate_choices': validate_choices}
         self._root = MenuNode(**node)
+        self._init_runtime(executor, max_concurrency, max_workers)
+
+    def _init_runtime(
+        self,
+        executor: 'Executor',
+        max_concurrency: int,
+        max_workers: int
+    ) -> None:
+        """Initialize state that is not part of the menu itself."""
+        self._table = None
+        self._table_revision = None
+        self._executor = executor
+        self._max_concurrency = max_concurrency
+        self._semaphore = None
+        self._semaphore_loop = None
+        self._max_workers = max_workers
+        self._pools = {}
+        self._metrics = None
+        self._tracer = None
+        self._sample_rate = 1.0
+        self._random = None
+
+    def save_snapshot(self, path: str) -> None:
+        """Save the menu to a snapshot file, for fast loading.
+
+        See `load_snapshot()`. End-point functions, parser classes and casts
+        are saved by import path, so they must be defined at the top level of
+        a module. A lazy menu is materialized first.
+
+        Raises:
+            TypeError: If part of the menu can't be saved by import path, or
+                a parser isn't an InputParser.
+        """
+        from prompt_smart_menu.snapshot import save_snapshot
+        save_snapshot(self, path)
+
+    @classmethod
+    def load_snapshot(
+        cls,
+        path: str,
+        executor: 'Executor' = None,
+        max_concurrency: int = None,
+        max_workers: int = None
+    ) -> 'PromptSmartMenu':
+        """Load a menu saved with `save_snapshot()`.
+
+        The snapshot is read at once and the menu is rebuilt without checking
+        it again, so only load snapshots you saved yourself. The remaining
+        arguments are as for `PromptSmartMenu()`.
+
+        Raises:
+            ValueError: If the file is not a snapshot this version can load.
+        """
+        from prompt_smart_menu.snapshot import load_snapshot
+        menu = cls.__new__(cls)
+        menu._root = load_snapshot(path)
+        menu._init_runtime(executor, max_concurrency, max_workers)
+        return menu
+
+    def __enter__(self) -> 'PromptSmartMenu':
+        """Enter a context that shuts down the menu's pools on exit."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:  # noqa: ANN002
+        """Shut down the menu's pools."""
+        self.shutdown()
+
+    def _pool(self, execution: str) -> 'Executor':
+        """Return the pool for an execution mode, starting it if needed."""
+        pool = self._pools.get(execution)
+        if pool is None:
+            from concurrent.futures import (ProcessPoolExecutor,
+                                            ThreadPoolExecutor)
+            if execution == 'thread':
+                pool = ThreadPoolExecutor(max_workers=self._max_workers)
+            else:
+                pool = ProcessPoolExecutor(max_workers=self._max_workers)
+            self._pools[execution] = pool
+        return pool
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Shut down the menu's thread and process pools.
+
+        Pools are started again if a pooled end-point is run afterwards.
+
+        Args:
+            wait (bool): If true, wait for running end-points to finish.
+                Default: True
+        """
+        pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait)
+
+    def materialize(self) -> None:
+        """Build every menu node of a lazy menu.
+
+        Raises:
+            TypeError: If any menu node dict is invalid.
+        """
+        self._root.materialize()
+
+    def validate_all(self) -> None:
+        """Build and check every menu node, as a non-lazy menu does.
+
+        Also compiles the argument validators of end-points with
+        validate_args, so that functions without an inspectable signature
+        are reported now rather than on first use.
+
+        Raises:
+            TypeError: If any menu node dict is invalid.
+            ValueError: If a validated function has no signature.
+        """
+        self._root.materialize()
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if not node._function:
+                stack.extend(node._children)
+            elif (node._settings.validate_args and
+                  not node._settings.stream_args):
+                node._get_validator()
+
+    def compile(self) -> None:  # noqa: A003, a method like re.compile()
+        """Flatten the menu into a dispatch table used by `run()`.
+
+        The table maps tuples of subcommands to the MenuNode they lead to, so
+        a command string is tokenized once and each subcommand costs a single
+        lookup instead of a parse per menu level. Argument validators of
+        end-points are compiled as well.
+
+        The table is rebuilt automatically by `run()` if the menu changes
+        after it was compiled. Compiling a lazy menu materializes it. Only
+        commands are in the table. Aliases and abbreviated subcommands miss
+        it and are resolved by walking the menu.
+        """
+        table = {}
+        stack = [((), self._root)]
+        while stack:
+            path, node = stack.pop()
+            if node._function:
+                if (node._settings.validate_args and
+                    not node._settings.stream_args
+                ):  # noqa E124
+                    node._get_validator()
+                continue
+            # Subcommands are only flattened through nodes parsed with
+            # InputParser's tokenizer. Anything else is left to process_arg.
+            parser = node._settings.parser
+            if not isinstance(parser, InputParser):
+                continue
+            node._materialize_children()
+            for child in node._children:
+                try:
+                    command = parser._type_cast(child._command)
+                except InvalidArgError:
+                    continue
+                if command != child._command:
+                    # The parser never produces this command as a string,
+                    # process_arg can't reach this child either.
+                    continue
+                child_path = path + (child._command,)
+                table[child_path] = child
+                stack.append((child_path, child))
+
+        self._table = table
+        self._table_revision = self._root._revision
 
     def nested_completer_dict(self) -> dict:
-        """Return a dict for `prompt_toolkit.NestedCompleter`."""
+        """Return a dict for `prompt_toolkit.NestedCompleter`.
+
+        The dict is cached and shared between calls. Do not modify it.
+        """
         return self._root.get_menu()['root']
 
+    def completer(
+        self,
+        ignore_case: bool = True,
+        deadline: float = 0.1
+    ):  # noqa: ANN
+        """Return a prompt_toolkit Completer for this menu.
+
+        Completes like `NestedCompleter.from_nested_dict()` given
+        `nested_completer_dict()`, but works on the menu directly and scales
+        with the number of matches rather than the number of candidates.
+        When prompt_toolkit completes asynchronously, stale children
+        providers are awaited for up to deadline seconds. Requires
+        prompt_toolkit.
+        """
+        from prompt_smart_menu.completer import SmartMenuCompleter
+        return SmartMenuCompleter(self, ignore_case=ignore_case,
+                                  deadline=deadline)
+
+    def _lookup(self, input_string: str) -> Tuple[MenuNode, int]:
+        """Find the compiled MenuNode a command string leads to.
+
+        Returns:
+            tuple: (node, end) where end is the index in input_string at
+                which node's arguments start. (None, 0) if the table has no
+                matching end-point.
+        """
+        if self._table_revision != self._root._revision:
+            self.compile()
+        table = self._table
+        path = ()
+        for command, _, end in InputParser._tokenize(input_string):
+            path += (command,)
+            node = table.get(path)
+            if node is None:
+                break
+            if (node._function or
+                not isinstance(node._settings.parser, InputParser)
+            ):  # noqa E124
+                return (node, end)
+        return (None, 0)
+
+    def _resolve(self, input_string: str) -> Tuple[MenuNode, str]:
+        """Find the end-point MenuNode and argument string of a command.
+
+        If the menu has been compiled, see `compile()`, the command is
+        resolved through the dispatch table.
+        """
+        if self._table is not None:
+            node, end = self._lookup(input_string)
+            if node is not None:
+                return node._resolve(input_string[end:])
+        # Errors are always reported by walking the menu
+        return self._root._resolve(input_string)
+
+    def _call(self, node: MenuNode, args_str: str):  # noqa: ANN
+        """Call an end-point's function according to its execution mode."""
+        if self._metrics is not None:
+            return self._call_measured(node, args_str)
+        args, kwargs = node._prepare_args(args_str)
+        if node._settings.execution == 'inline':
+            return node._function(*args, **kwargs)
+        return self._pool(node._settings.execution).submit(
+            node._function, *args, **kwargs)
+
+    def _call_measured(self, node: MenuNode, args_str: str):  # noqa: ANN
+        """Call an end-point's function, recording its metrics."""
+        metrics = self._metrics
+        node_metrics, args, kwargs = metrics._prepare_args(node, args_str)
+        start = perf_counter()
+        if node._settings.execution == 'inline':
+            try:
+                result = node._function(*args, **kwargs)
+            except BaseException:  # noqa: B902, counted then re-raised
+                metrics._executed(node_metrics, perf_counter() - start, True)
+                raise
+            metrics._executed(node_metrics, perf_counter() - start)
+            return result
+
+        def done(future):  # noqa: ANN
+            metrics._executed(node_metrics, perf_counter() - start,
+                              future.cancelled() or
+                              future.exception() is not None)
+
+        future = self._pool(node._settings.execution).submit(
+            node._function, *args, **kwargs)
+        future.add_done_callback(done)
+        return future
+
+    def enable_metrics(
+        self,
+        buckets: Iterable[float] = None,
+        callback: Callable[[dict], None] = None,
+        push_every: int = None
+    ) -> 'MenuMetrics':
+        """Start recording call counts and latencies of end-points.
+
+        Replaces any metrics already being recorded. See `MenuMetrics` for
+        what is recorded, and its `snapshot()`, `reset()` and `push()`
+        methods to read them.
+
+        Args:
+            buckets (Iterable[float]): Upper bounds, in seconds, of the
+                latency histogram buckets. Default: powers of ten from 10us
+                to 10s.
+            callback (Callable): Called with each snapshot pushed by
+                `MenuMetrics.push()`.
+            push_every (int): If set, a snapshot is pushed to callback, and
+                the metrics reset, after this many calls.
+
+        Returns:
+            MenuMetrics: The metrics being recorded.
+        """
+        from prompt_smart_menu.metrics import DEFAULT_BUCKETS, MenuMetrics
+        self._metrics = MenuMetrics(
+            DEFAULT_BUCKETS if buckets is None else buckets,
+            callback, push_every)
+        return self._metrics
+
+    def disable_metrics(self) -> 'MenuMetrics':
+        """Stop recording metrics.
+
+        Returns:
+            MenuMetrics: The metrics recorded until now, or None.
+        """
+        metrics, self._metrics = self._metrics, None
+        return metrics
+
+    @property
+    def metrics(self) -> 'MenuMetrics':
+        """The MenuMetrics being recorded, or None if disabled."""
+        return self._metrics
+
+    def set_tracer(self, tracer: 'Tracer', sample_rate: float = 1.0) -> None:
+        """Call a tracer's hooks around each stage of sampled commands.
+
+        See `prompt_smart_menu.tracing.Tracer` for the stages. Commands run
+        with `run()` and `run_many()` are sampled. A sampled command is
+        resolved by walking the menu, even if it has been compiled. Other
+        commands run exactly as without a tracer.
+
+        Args:
+            tracer (Tracer): An object with `before()` and `after()`
+                methods, or None to stop tracing.
+            sample_rate (float): The fraction of commands traced, chosen at
+                random. Default: 1.0, every command.
+        """
+        if tracer is not None:
+            if not (callable(getattr(tracer, 'before', None)) and
+                    callable(getattr(tracer, 'after', None))):
+                raise TypeError('tracer must have before() and after() '
+                                'methods.')
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError('sample_rate must be between 0.0 and 1.0.')
+            from random import random
+            self._random = random
+        self._tracer = tracer
+        self._sample_rate = sample_rate
+
+    def _sampled(self) -> bool:
+        """Return true if the next command should be traced."""
+        return (self._sample_rate >= 1.0 or
+                self._random() < self._sample_rate)
+
     def run(self, input_string: str):
-        """Run a command string against with your menu."""
-        return self._root.process_arg(input_string)
+        """Run a command string against with your menu.
+
+        Returns:
+            The end-point function's result. For end-points with a 'thread'
+            or 'process' execution mode, a `concurrent.futures.Future` of it.
+        """
+        if self._tracer is not None and self._sampled():
+            from prompt_smart_menu.tracing import run_traced
+            return run_traced(self, input_string)
+        return self._call(*self._resolve(input_string))
+
+    async def run_async(self, input_string: str):
+        """Run a command string against your menu from an asyncio event loop.
+
+        Coroutine end-point functions are awaited. Other end-point functions
+        are run in the menu's executor, or its pool for 'thread' and 'process'
+        execution modes, so a slow function doesn't block the event loop.
+        Any number of commands can be run concurrently, for example with
+        `asyncio.gather()`, but at most `max_concurrency` of their end-point
+        functions run at once.
+
+        Raises:
+            InvalidArgError: See `run()`.
+        """
+        import asyncio
+        from inspect import isawaitable, iscoroutinefunction
+
+        node, args_str = self._resolve(input_string)
+        metrics = self._metrics
+        if metrics is None:
+            args, kwargs = node._prepare_args(args_str)
+        else:
+            node_metrics, args, kwargs = metrics._prepare_args(node, args_str)
+        function = node._function
+        if node._settings.execution == 'inline':
+            executor = self._executor
+        else:
+            executor = self._pool(node._settings.execution)
+        async with self._concurrency_limit():
+            start = perf_counter()
+            try:
+                if iscoroutinefunction(function):
+                    result = await function(*args, **kwargs)
+                else:
+                    loop = asyncio.get_event_loop()
+                    result = await loop.run_in_executor(
+                        executor, partial(function, *args, **kwargs))
+                    if isawaitable(result):
+                        result = await result
+            except BaseException:  # noqa: B902, counted then re-raised
+                if metrics is not None:
+                    metrics._executed(node_metrics, perf_counter() - start,
+                                      True)
+                raise
+            if metrics is not None:
+                metrics._executed(node_metrics, perf_counter() - start)
+            return result
+
+    def _concurrency_limit(self) -> 'asyncio.Semaphore':
+        """Return the semaphore limiting `run_async()` on this event loop."""
+        if self._max_concurrency is None:
+            return _NO_LIMIT
+        import asyncio
+        loop = asyncio.get_event_loop()
+        if self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def run_many(
+        self,
+        input_strings: Iterable[str],
+        stop_on_error: bool = False
+    ) -> Iterator[Tuple[bool, Any]]:
+        """Run many command strings, streaming back the outcome of each.
+
+        The menu is compiled if it hasn't been already. When consecutive
+        command strings start with the same subcommands, the end-point found
+        for the first is reused for the rest without another lookup.
+
+        Args:
+            input_strings (Iterable[str]): The command strings to run.
+            stop_on_error (bool): If true, stop after the first command that
+                raises InvalidArgError. Otherwise carry on with the next one.
+                Default: False
+
+        Yields:
+            tuple: (True, result) for each command that ran, or
+                (False, InvalidArgError) for each command that was invalid.
+                Other exceptions are raised.
+        """
+        if self._table is None:
+            self.compile()
+        prefix = node = revision = None
+        for input_string in input_strings:
+            try:
+                if self._tracer is not None and self._sampled():
+                    from prompt_smart_menu.tracing import run_traced
+                    result = run_traced(self, input_string)
+                # Reuse the last end-point if the subcommands are unchanged
+                elif (prefix is not None and
+                      revision == self._root._revision and
+                      input_string.startswith(prefix) and
+                      input_string[len(prefix):len(prefix) + 1] in ('', ' ')
+                ):  # noqa E124
+                    result = self._call(
+                        *node._resolve(input_string[len(prefix):]))
+                else:
+                    node, end = self._lookup(input_string)
+                    if node is None:
+                        prefix = None
+                        result = self._call(
+                            *self._root._resolve(input_string))
+                    else:
+                        prefix = input_string[:end]
+                        revision = self._root._revision
+                        result = self._call(
+                            *node._resolve(input_string[end:]))
+            except InvalidArgError as e:
+                yield (False, e)
+                if stop_on_error:
+                    return
+            else:
+                yield (True, result)
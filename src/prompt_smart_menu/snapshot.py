@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""Save and load validated menus as compact JSON snapshots.
+
+Functions, parser classes and casts are stored by import path, in the form
+'module:qualname', and imported again when a snapshot is loaded.
+"""
+import gc
+import json
+from importlib import import_module
+from typing import Callable
+
+from prompt_smart_menu.helpers import NestedDict
+from prompt_smart_menu.providers import ChildrenProvider
+from prompt_smart_menu.smart_menu import MenuNode
+
+# Bumped whenever the layout below changes
+SNAPSHOT_FORMAT = 6
+
+# A node is stored as a list:
+#   [command, function, children, parser, validate_args, stream_args,
+#    execution, aliases, prefix_match, fuzzy_match, validate_choices]
+# function is an index into the snapshot's functions, or None for a node with
+# children nodes, in which case children is a list of nodes. For end-points,
+# children is None, a list of strings, {'nest': nest} for a NestedDict,
+# where sets in the nest are stored as lists, or {'provider': [function, ttl,
+# max_size]} for a ChildrenProvider. parser is an index into the
+# snapshot's parsers, each stored as [class, casts, options] where options are
+# the keyword arguments returned by the parser's _options(). aliases is a list
+# of strings.
+
+
+def _import_path(obj: Callable) -> str:
+    """Return the import path of a module level object."""
+    module = getattr(obj, '__module__', None)
+    qualname = getattr(obj, '__qualname__', None)
+    if module and qualname and '<' not in qualname:
+        path = f'{module}:{qualname}'
+        try:
+            if _import_object(path) is obj:
+                return path
+        except (ImportError, AttributeError):
+            pass
+    raise TypeError(f'Cannot save {obj!r} by import path. It must be defined '
+                    f'at the top level of a module.')
+
+
+def _import_object(path: str) -> Callable:
+    """Import an object from its import path."""
+    module, qualname = path.split(':')
+    obj = import_module(module)
+    for name in qualname.split('.'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def _encode_nest(nest: dict) -> dict:
+    """Convert a NestedDict nest to JSON types."""
+    encoded = {}
+    for key, value in nest.items():
+        if isinstance(value, dict):
+            value = _encode_nest(value)
+        elif isinstance(value, (set, frozenset)):
+            value = sorted(value)
+        elif value is not None:
+            raise TypeError(f'Cannot save NestedDict value {value!r}.')
+        encoded[key] = value
+    return encoded
+
+
+def _decode_nest(encoded: dict) -> dict:
+    """Convert a nest stored by _encode_nest() back."""
+    nest = {}
+    for key, value in encoded.items():
+        if isinstance(value, dict):
+            value = _decode_nest(value)
+        elif value is not None:
+            value = set(value)
+        nest[key] = value
+    return nest
+
+
+def save_snapshot(menu, path: str) -> None:  # noqa: ANN
+    """Save a PromptSmartMenu to a snapshot file."""
+    parsers = []
+    parser_index = {}
+    functions = []
+    function_index = {}
+
+    def encode(node: MenuNode, aliases: list) -> list:
+        settings = node._settings
+        parser = id(settings.parser)
+        if parser not in parser_index:
+            if (not hasattr(settings.parser, '_casts') or
+                not hasattr(settings.parser, '_options')
+            ):  # noqa E124
+                raise TypeError(f'Cannot save parser {settings.parser!r}. '
+                                f'It must be an InputParser.')
+            parser_index[parser] = len(parsers)
+            parsers.append([_import_path(type(settings.parser)),
+                            [_import_path(c) for c in settings.parser._casts],
+                            settings.parser._options()])
+
+        if not node._function:
+            function = None
+            children = [encode(child, node._aliases_of(child._command))
+                        for child in node._children]
+        else:
+            function = function_index.get(id(node._function))
+            if function is None:
+                function = function_index[id(node._function)] = len(functions)
+                functions.append(_import_path(node._function))
+            if isinstance(node._children, NestedDict):
+                children = {'nest': _encode_nest(node._children.nest)}
+            elif not isinstance(node._children, tuple):
+                provider = node._children
+                children = {'provider': [_import_path(provider.function),
+                                         provider.ttl, provider.max_size]}
+            else:
+                children = list(node._children) or None
+        return [node._command, function, children, parser_index[parser],
+                settings.validate_args, settings.stream_args,
+                settings.execution, aliases, settings.prefix_match,
+                settings.fuzzy_match, settings.validate_choices]
+
+    menu.materialize()
+    root = encode(menu._root, [])
+    snapshot = {'format': SNAPSHOT_FORMAT,
+                'parsers': parsers,
+                'functions': functions,
+                'menu': root}
+    with open(path, 'w') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+
+
+def load_snapshot(path: str) -> MenuNode:
+    """Load the root MenuNode of a snapshot file."""
+    with open(path) as f:
+        snapshot = json.load(f)
+    if (not isinstance(snapshot, dict) or
+        snapshot.get('format') != SNAPSHOT_FORMAT
+    ):  # noqa E124
+        raise ValueError(f'Not a version {SNAPSHOT_FORMAT} menu snapshot: '
+                         f'{path}')
+
+    parsers = []
+    for parser_class, casts, options in snapshot['parsers']:
+        parsers.append(_import_object(parser_class)(
+            *[_import_object(c) for c in casts], **options))
+    functions = [_import_object(f) for f in snapshot['functions']]
+
+    def decode(encoded: list) -> MenuNode:
+        (command, function, children, parser, validate_args, stream_args,
+         execution, _, prefix_match, fuzzy_match,
+         validate_choices) = encoded
+        alias_index = None
+        if function is None:
+            # A node's aliases are indexed by its parent
+            alias_index = {alias: child[0] for child in children
+                           for alias in child[7]}
+            children = tuple(decode(child) for child in children)
+        else:
+            function = functions[function]
+            if isinstance(children, dict) and 'provider' in children:
+                provider, ttl, max_size = children['provider']
+                children = ChildrenProvider(_import_object(provider), ttl,
+                                            max_size)
+            elif isinstance(children, dict):
+                children = NestedDict(_decode_nest(children['nest']))
+            else:
+                children = tuple(children or ())
+        return MenuNode._restore(command, function, children,
+                                 parsers[parser], validate_args, stream_args,
+                                 execution, alias_index, prefix_match,
+                                 fuzzy_match, validate_choices)
+
+    # Nothing built here is garbage, don't let the collector walk it
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return decode(snapshot['menu'])
+    finally:
+        if gc_enabled:
+            gc.enable()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+"""Hooks around the stages of individual commands run by a PromptSmartMenu.
+
+Enabled with `PromptSmartMenu.set_tracer()`. Menus without a tracer never
+import this module.
+"""
+import copy
+from concurrent.futures import CancelledError
+from time import perf_counter
+from typing import Callable
+
+from prompt_smart_menu.input_parser import InputParser
+
+
+class Tracer:
+    """Base class for tracers. Override `before()` and `after()`.
+
+    A traced command goes through these stages, each given an info dict:
+
+    - 'command': The whole command. info: 'input', the command string.
+    - 'parse': One call to a parser's `parse()`, for a subcommand or for an
+      end-point's arguments. info: 'parser', 'input' and 'recurse'.
+    - 'cast': One cast of one argument. info: 'cast' and 'item'.
+    - 'validate': Validating an end-point's arguments. info: 'path', the
+      end-point's subcommands, 'args' and 'kwargs'.
+    - 'call': Calling an end-point's function. info: 'path', 'args' and
+      'kwargs'. For 'thread' and 'process' execution modes, the stage ends
+      when the function's future completes.
+
+    The same info dict is passed to `before()` and `after()` of a stage, so
+    a tracer can keep state in it, such as a span or a start time. If the
+    stage succeeded, `after()` finds its return value in info['result'].
+    """
+
+    def before(self, stage: str, info: dict) -> None:
+        """Handle the start of a stage."""
+
+    def after(self, stage: str, info: dict,
+              error: BaseException = None) -> None:
+        """Handle the end of a stage, with the exception if it raised."""
+
+
+def trace_stage(tracer: Tracer, stage: str, info: dict, function: Callable,
+                *args, **kwargs):  # noqa: ANN
+    """Call function between the tracer's hooks for a stage."""
+    tracer.before(stage, info)
+    try:
+        result = function(*args, **kwargs)
+    except BaseException as e:  # noqa: B902, traced then re-raised
+        tracer.after(stage, info, e)
+        raise
+    info['result'] = result
+    tracer.after(stage, info)
+    return result
+
+
+class _TracedCast:
+    """Wraps a cast, calling a tracer's hooks around each `type_cast()`."""
+
+    __slots__ = ('_cast', '_tracer')
+
+    def __init__(self, cast, tracer: Tracer) -> None:  # noqa: ANN
+        self._cast = cast
+        self._tracer = tracer
+
+    def type_cast(self, item):  # noqa: ANN
+        return trace_stage(self._tracer, 'cast',
+                           {'cast': self._cast, 'item': item},
+                           self._cast.type_cast, item)
+
+
+class _TracedParser:
+    """Wraps a parser, calling a tracer's hooks around each `parse()`.
+
+    The casts of an InputParser are traced as well.
+    """
+
+    __slots__ = ('_parser', '_traced', '_tracer')
+
+    def __init__(self, parser: InputParser, tracer: Tracer) -> None:
+        self._parser = parser
+        self._tracer = tracer
+        self._traced = parser
+        if isinstance(parser, InputParser):
+            self._traced = copy.copy(parser)
+            self._traced._casts = [_TracedCast(cast, tracer)
+                                   for cast in parser._casts]
+            self._traced._cast_chain = InputParser._compile_casts(
+                self._traced._casts)
+            self._traced._cast_many = InputParser._compile_bulk_casts(
+                self._traced._casts)
+            # Cached results would skip the casts being traced
+            self._traced._cache = None
+
+    def parse(self, input_string: str, recurse: bool = False) -> list:
+        info = {'parser': self._parser,
+                'input': input_string,
+                'recurse': recurse}
+        return trace_stage(self._tracer, 'parse', info, self._traced.parse,
+                           input_string, recurse)
+
+    def iter_parse(self, input_string: str):  # noqa: ANN
+        # Consumed by the end-point itself, so only casts are traced
+        return self._traced.iter_parse(input_string)
+
+
+def traced_parser(parser: InputParser, tracer: Tracer) -> _TracedParser:
+    """Return a parser that calls the tracer's hooks around parser."""
+    return _TracedParser(parser, tracer)
+
+
+def run_traced(menu, input_string: str):  # noqa: ANN
+    """Run a command string on a PromptSmartMenu, tracing every stage."""
+    tracer = menu._tracer
+    return trace_stage(tracer, 'command', {'input': input_string},
+                       _run_traced, menu, tracer, input_string)
+
+
+def _run_traced(menu, tracer: Tracer, input_string: str):  # noqa: ANN
+    """Run a command string like `PromptSmartMenu.run()`, with hooks."""
+    node, args_str = menu._root._resolve(input_string, tracer)
+    path = node._path()
+    metrics = menu._metrics
+    if metrics is not None:
+        node_metrics = metrics._node_metrics(node)
+
+    settings = node._settings
+    start = perf_counter()
+    try:
+        args, kwargs = node._parse_args(args_str,
+                                        traced_parser(settings.parser, tracer))
+        parsed = perf_counter()
+        if settings.validate_args:
+            trace_stage(tracer, 'validate',
+                        {'path': path, 'args': args, 'kwargs': kwargs},
+                        node._check_args, args, kwargs)
+        validated = perf_counter()
+    except Exception:  # noqa: B902, counted then re-raised
+        if metrics is not None:
+            metrics._executed(node_metrics, None)
+        raise
+    if metrics is not None:
+        metrics._prepared(node_metrics, parsed - start,
+                          (validated - parsed if settings.validate_args
+                           else None))
+
+    kwargs = {k.key(): k.value() for k in kwargs}
+    info = {'path': path, 'args': args, 'kwargs': kwargs}
+
+    def finished(error: BaseException = None) -> None:
+        if metrics is not None:
+            metrics._executed(node_metrics, perf_counter() - start,
+                              error is not None)
+        tracer.after('call', info, error)
+
+    tracer.before('call', info)
+    start = perf_counter()
+    if settings.execution == 'inline':
+        try:
+            result = node._function(*args, **kwargs)
+        except BaseException as e:  # noqa: B902, traced then re-raised
+            finished(e)
+            raise
+        info['result'] = result
+        finished()
+        return result
+
+    def done(future):  # noqa: ANN
+        if future.cancelled():
+            finished(CancelledError())
+        elif future.exception() is not None:
+            finished(future.exception())
+        else:
+            info['result'] = future.result()
+            finished()
+
+    future = menu._pool(settings.execution).submit(
+        node._function, *args, **kwargs)
+    future.add_done_callback(done)
+    return future
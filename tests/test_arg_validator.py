@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+from prompt_smart_menu.arg_validator import ArgValidator
+from prompt_smart_menu.helpers import InvalidArgError, Kwarg
+
+import pytest
+
+
+def validate_dummy(b, c='c', *d, e, f='f', **g):
+    pass
+
+
+def positional_or_keyword(b, c=int):
+    pass
+
+
+class TestArgValidator:
+    validator = ArgValidator(validate_dummy)
+
+    @pytest.mark.parametrize('args,kwargs', [
+        ([1], ['e']),
+        ([1, 2, 3, 4], ['e', 'f', 'g']),
+        ([], ['b', 'e', 'z']),
+    ])
+    def test_valid(self, args, kwargs):
+        self.validator.validate(args, [Kwarg(k, k) for k in kwargs])
+
+    @pytest.mark.parametrize('args,kwargs', [
+        ([], ['e']),
+        ([1], []),
+        ([1], ['b', 'e']),
+        ([1], ['e', 'e']),
+    ])
+    def test_invalid(self, args, kwargs):
+        with pytest.raises(InvalidArgError):
+            self.validator.validate(args, [Kwarg(k, k) for k in kwargs])
+
+    def test_type_default_is_optional(self):
+        ArgValidator(positional_or_keyword).validate([1], [])
+
+    def test_too_many_args_message(self):
+        validator = ArgValidator(positional_or_keyword)
+
+        with pytest.raises(InvalidArgError,
+                           match='takes 2 positional arguments but 3'):
+            validator.validate([1, 2, 3], [])
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import time
+
+from prompt_smart_menu import ChildrenProvider, NestedDict, PromptSmartMenu
+
+import pytest
+
+completion = pytest.importorskip('prompt_toolkit.completion')
+document = pytest.importorskip('prompt_toolkit.document')
+
+
+def dummy(*args, **kwargs):
+    pass
+
+
+@pytest.fixture
+def menu():
+    menu_config = [
+        {'command': 'exit', 'function': dummy},
+        {'command': 'Echo', 'function': dummy},
+        {'command': 'ssh', 'function': dummy,
+         'children': ['host1', 'host2', 'Host3', 'db1']},
+        {'command': 'show', 'children': [
+            {'command': 'version', 'function': dummy},
+            {'command': 'ip', 'function': dummy,
+             'children': NestedDict({'interface': {'brief'}, 'route': None})},
+        ]},
+    ]
+    return PromptSmartMenu(menu_config)
+
+
+def complete(completer, text):
+    doc = document.Document(text, len(text))
+    event = completion.CompleteEvent()
+    return sorted((c.text, c.start_position)
+                  for c in completer.get_completions(doc, event))
+
+
+@pytest.mark.parametrize('text', ['', 'e', 'E', 'ex', 'x', 'ssh ', 'ssh h',
+                                  'ssh H', 'ssh host1 ', 'show ', 'show v',
+                                  'show ip ', 'show ip interface b',
+                                  'nope ', '  sh', 'show  ver'])
+def test_matches_nested_completer(menu, text):
+    nested = completion.NestedCompleter.from_nested_dict(
+        menu.nested_completer_dict())
+
+    assert complete(menu.completer(), text) == complete(nested, text)
+
+
+def test_case_sensitive(menu):
+    completer = menu.completer(ignore_case=False)
+
+    assert complete(completer, 'ssh h') == [('host1', -1), ('host2', -1)]
+    assert complete(completer, 'e') == [('exit', -1)]
+
+
+def test_add_child_updates_completions(menu):
+    completer = menu.completer()
+    assert complete(completer, 'show w') == []
+
+    menu._root._child_index['show'].add_child(
+        {'command': 'who', 'function': dummy})
+
+    assert complete(completer, 'show w') == [('who', -1)]
+
+
+def test_lazy_menu():
+    leaf = {'command': 'leaf', 'function': dummy}
+    broken = {'command': 'broken', 'children': ['not', 'nodes']}
+    menu_config = [{'command': 'tree', 'children': [leaf]},
+                   {'command': 'bad', 'children': [broken]}]
+    completer = PromptSmartMenu(menu_config, lazy=True).completer()
+
+    assert complete(completer, '') == [('bad', 0), ('tree', 0)]
+    assert complete(completer, 'tree l') == [('leaf', -1)]
+
+
+def test_aliases_and_prefixes_followed():
+    menu_config = [{'command': 'show', 'aliases': ['display'], 'children': [
+        {'command': 'version', 'function': dummy}]},
+        {'command': 'shutdown', 'function': dummy}]
+    completer = PromptSmartMenu(menu_config, prefix_match=True).completer()
+
+    assert complete(completer, 'd') == []
+    assert complete(completer, 'display v') == [('version', -1)]
+    assert complete(completer, 'sho v') == [('version', -1)]
+    assert complete(completer, 'sh v') == []
+
+
+class TestAsyncCompletion:
+
+    @staticmethod
+    def complete_async(completer, text):
+        async def collect():
+            doc = document.Document(text, len(text))
+            event = completion.CompleteEvent()
+            return sorted([c.text async for c in
+                           completer.get_completions_async(doc, event)])
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(collect())
+        finally:
+            loop.close()
+
+    @staticmethod
+    def slow_menu(delay, deadline=1.0):
+        def hosts():
+            time.sleep(delay)
+            return ['host1', 'host2']
+
+        provider = ChildrenProvider(hosts)
+        psm = PromptSmartMenu([{'command': 'ssh', 'function': dummy,
+                                'children': provider},
+                               {'command': 'show', 'function': dummy}])
+        return psm.completer(deadline=deadline), provider
+
+    def test_matches_sync(self, menu):
+        completer = menu.completer()
+        for text in ['', 's', 'show ', 'show ip interface b', 'ssh h']:
+            assert self.complete_async(completer, text) == [
+                c[0] for c in complete(completer, text)]
+
+    def test_waits_for_provider(self):
+        completer, _ = self.slow_menu(0.05)
+
+        assert self.complete_async(completer, 'ssh h') == ['host1', 'host2']
+
+    def test_deadline(self):
+        completer, provider = self.slow_menu(0.5, deadline=0.01)
+
+        start = time.perf_counter()
+        assert self.complete_async(completer, 'ssh h') == []
+        assert time.perf_counter() - start < 0.4
+        provider.wait(5)
+        assert self.complete_async(completer, 'ssh h') == ['host1', 'host2']
+
+    def test_prefetch(self):
+        completer, provider = self.slow_menu(0)
+
+        assert self.complete_async(completer, 'ss') == ['ssh']
+        assert provider.wait(5)
+        assert provider.stats()['refreshes'] == 1
+
+    def test_stale_request_dropped(self):
+        completer, provider = self.slow_menu(0.1)
+
+        async def race():
+            async def request(text):
+                doc = document.Document(text, len(text))
+                return [c.text async for c in completer.get_completions_async(
+                    doc, completion.CompleteEvent())]
+
+            first = asyncio.ensure_future(request('ssh h'))
+            await asyncio.sleep(0.01)
+            second = asyncio.ensure_future(request('ssh ho'))
+            return await first, await second
+
+        loop = asyncio.new_event_loop()
+        try:
+            first, second = loop.run_until_complete(race())
+        finally:
+            loop.close()
+        assert first == []
+        assert second == ['host1', 'host2']
+
+    def test_coroutine_provider(self):
+        async def hosts():
+            await asyncio.sleep(0)
+            return ['host1']
+
+        psm = PromptSmartMenu([{'command': 'ssh', 'function': dummy,
+                                'children': hosts}])
+
+        assert self.complete_async(psm.completer(), 'ssh ') == ['host1']
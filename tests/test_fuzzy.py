@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+import random
+
+from prompt_smart_menu.fuzzy import EditIndex
+
+
+def levenshtein(a, b):
+    """Optimal string alignment distance, compared against every word."""
+    d = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)]
+         for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1,
+                          d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and
+                a[i - 2] == b[j - 1]
+            ):  # noqa E124
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+
+class TestEditIndex:
+
+    def test_lookup(self):
+        index = EditIndex(['show', 'shell', 'status', 'Stats'])
+
+        assert index.lookup('shw') == [(1, 'show')]
+        assert index.lookup('stats') == [(0, 'Stats'), (1, 'status')]
+        assert index.lookup('shells') == [(1, 'shell')]
+        assert index.lookup('xyz') == []
+        assert index.lookup('') == []
+        assert EditIndex([]).lookup('show') == []
+
+    def test_lookup_matches_brute_force(self):
+        rng = random.Random(1)
+        words = {''.join(rng.choice('abcd') for _ in range(rng.randrange(6)))
+                 for _ in range(200)}
+        index = EditIndex(words)
+        for _ in range(200):
+            query = ''.join(rng.choice('abcd')
+                            for _ in range(rng.randrange(7)))
+            expected = sorted((levenshtein(query, word), word)
+                              for word in words
+                              if levenshtein(query, word) <= 1)
+            assert index.lookup(query) == expected
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+
+import prompt_smart_menu
+
+import pytest
+
+# Import cost of the package on top of interpreter start up, in microseconds
+IMPORT_BUDGET_US = 100000
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 7),
+                                reason='-X importtime needs Python 3.7')
+
+
+def import_times(code):
+    """Return {module: self time in usec} from `python -X importtime`."""
+    env = dict(os.environ)
+    # Import the same prompt_smart_menu these tests run against
+    package_dir = os.path.dirname(os.path.dirname(prompt_smart_menu.__file__))
+    env['PYTHONPATH'] = os.pathsep.join(
+        [package_dir] + [p for p in [env.get('PYTHONPATH')] if p])
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            env=env, stderr=subprocess.PIPE,
+                            universal_newlines=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        self_time, _, module = line[len('import time:'):].split('|')
+        if self_time.strip().isdigit():
+            times[module.strip()] = int(self_time)
+    return times
+
+
+@pytest.fixture(scope='module')
+def startup_modules():
+    return set(import_times('pass'))
+
+
+@pytest.mark.parametrize('code', [
+    'import prompt_smart_menu',
+    'from prompt_smart_menu import PromptSmartMenu',
+])
+def test_import_time(code, startup_modules):
+    times = import_times(code)
+    package_time = sum(t for module, t in times.items()
+                       if module not in startup_modules)
+    assert package_time < IMPORT_BUDGET_US
+    assert 'pkg_resources' not in times
+    assert 'asyncio' not in times
+    assert 'concurrent.futures' not in times
+
+
+def test_lazy_attributes():
+    assert prompt_smart_menu.PromptSmartMenu.__name__ == 'PromptSmartMenu'
+    assert prompt_smart_menu.NestedDict.__name__ == 'NestedDict'
+    assert isinstance(prompt_smart_menu.__version__, str)
+    assert set(prompt_smart_menu.__all__) <= set(dir(prompt_smart_menu))
+    with pytest.raises(AttributeError):
+        prompt_smart_menu.no_such_attribute
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+from array import array
+
 from prompt_smart_menu.helpers import InvalidArgError, Kwarg
 from prompt_smart_menu.input_parser import InputParser, KwargCast, NumberCast
 
@@ -93,6 +95,31 @@ class TestInputParser:
         assert self.ip.parse('prompt smart menu', recurse=True) == expected
         assert self.ip.parse(' prompt smart menu  ', recurse=True) == expected
 
+    def test_parse_recurse_quotes(self):
+        expected = ['prompt', 'smart menu', 'a"b', 'c']
+        assert self.ip.parse('prompt "smart menu" a"b \'c\'',
+                             recurse=True) == expected
+
+    def test_parse_recurse_quote_raises(self):
+        with pytest.raises(ValueError):
+            self.ip.parse('prompt smart "menu', recurse=True)
+
+    def test_iter_parse(self):
+        expected = ['prompt', 'smart menu', '']
+        assert list(self.ip.iter_parse(' prompt "smart menu" "" ')) == expected
+        assert list(self.ip.iter_parse('  ')) == []
+
+    def test_iter_parse_is_lazy(self):
+        args = self.ip.iter_parse('prompt smart "menu')
+        assert next(args) == 'prompt'
+        assert next(args) == 'smart'
+        with pytest.raises(ValueError):
+            next(args)
+
+    def test_parse_recurse_many_args(self):
+        args = [str(i) for i in range(100000)]
+        assert self.ip.parse(' '.join(args), recurse=True) == args
+
 
 class TestNumberCast:
     ip = InputParser(NumberCast)
@@ -113,10 +140,19 @@ class TestNumberCast:
         assert self.ip.parse(s) == ['2']
         assert self.ip.parse(s) == ['2']
 
+    @pytest.mark.parametrize('s', ['"2"', "'2'", '`2`'])
+    def test_parse_quotes_recurse(self, s):
+        assert self.ip.parse(f'{s} 2 {s}', recurse=True) == ['2', 2, '2']
+
 
 class TestNumberKwargCast:
     ip = InputParser(KwargCast, NumberCast)
 
+    def test_iter_parse(self):
+        result = list(self.ip.iter_parse('1 2.5 --key=3'))
+        assert result[:2] == [1, 2.5]
+        assert result[2].value() == 3
+
     def test_kwarg_value(self):
         result = self.ip.parse('--key=2')
         assert isinstance(result[0], Kwarg)
@@ -175,3 +211,183 @@ class TestMultiCast:
         ip = InputParser(KwargCast, NumberCast)
 
         assert isinstance(ip.parse(arg)[0], arg_type)
+
+
+class UpperCast:
+    @staticmethod
+    def type_cast(item):
+        return item.upper() if isinstance(item, str) else item
+
+
+class TestFusedCasts:
+
+    @staticmethod
+    def unfused(casts, item):
+        for cast in casts:
+            item = cast.type_cast(item)
+        return item
+
+    @pytest.mark.parametrize('casts', [[NumberCast],
+                                       [KwargCast],
+                                       [KwargCast, NumberCast],
+                                       [NumberCast, KwargCast],
+                                       [UpperCast, KwargCast, NumberCast]])
+    @pytest.mark.parametrize('item', ['word', '42', '-7', '+1_000', '3.5',
+                                      '.5', '1e3', 'inf', '-nan', '٣',
+                                      '²', '-', '--', '--key=2', '--k=x',
+                                      '--a-b=1', '--µ=1', 'nan1'])
+    def test_same_as_each_cast(self, casts, item):
+        def result(function):
+            try:
+                value = function(item)
+            except InvalidArgError as e:
+                return str(e)
+            if isinstance(value, Kwarg):
+                return (Kwarg, value.key(), value.value())
+            return (type(value), str(value))
+
+        assert (result(InputParser(*casts)._type_cast) ==
+                result(lambda item: self.unfused(casts, item)))
+
+    def test_custom_cast_order(self):
+        ip = InputParser(UpperCast, KwargCast)
+        assert ip.parse('--key=v', recurse=True)[0].key() == 'KEY'
+
+
+class DoubleCast:
+    calls = []
+
+    @staticmethod
+    def type_cast(item):
+        return item * 2
+
+    @classmethod
+    def type_cast_many(cls, items):
+        cls.calls.append(list(items))
+        return [item * 2 for item in items]
+
+
+class TestBulkCasts:
+
+    @pytest.mark.parametrize('s', ['1 2 3',
+                                   '1 "2" 3 4',
+                                   'a 2.5 --k=3 --j=x',
+                                   '\t12 -4 ',
+                                   ''])
+    def test_same_as_iter_parse(self, s):
+        ip = InputParser(KwargCast, NumberCast)
+        parsed = ip.parse(s, recurse=True)
+        expected = list(ip.iter_parse(s))
+
+        assert [str(arg) for arg in parsed] == [str(arg) for arg in expected]
+        assert ([type(arg) for arg in parsed] ==
+                [type(arg) for arg in expected])
+
+    def test_type_cast_many_runs(self):
+        DoubleCast.calls.clear()
+        ip = InputParser(DoubleCast)
+
+        assert ip.parse('a b "c" d', recurse=True) == ['aa', 'bb', 'c', 'dd']
+        assert DoubleCast.calls == [['a', 'b'], ['d']]
+
+    def test_cast_error_before_quote_error(self):
+        ip = InputParser(KwargCast)
+        with pytest.raises(InvalidArgError):
+            ip.parse('--for=1 "', recurse=True)
+
+
+class TestPackNumbers:
+
+    ip = InputParser(KwargCast, NumberCast, pack_numbers=True)
+
+    def test_ints(self):
+        assert (self.ip.parse('1 2 -3', recurse=True) ==
+                [array('q', [1, 2, -3])])
+
+    def test_floats(self):
+        assert (self.ip.parse('1 2.5', recurse=True) ==
+                [array('d', [1.0, 2.5])])
+
+    def test_kwargs_not_packed(self):
+        packed, kwarg = self.ip.parse('1 2 --k=3', recurse=True)
+        assert packed == array('q', [1, 2])
+        assert (kwarg.key(), kwarg.value()) == ('k', 3)
+
+    @pytest.mark.parametrize('s', ['1 a', '1 "2"', ''])
+    def test_not_all_numbers(self, s):
+        assert self.ip.parse(s, recurse=True) == InputParser(
+            KwargCast, NumberCast).parse(s, recurse=True)
+
+    @pytest.mark.parametrize('s', [f'1 {2 ** 64}', f'{2 ** 53 + 1} 1.5',
+                                   f'{10 ** 400} 1.5'])
+    def test_inexact_not_packed(self, s):
+        assert self.ip.parse(s, recurse=True) == InputParser(
+            KwargCast, NumberCast).parse(s, recurse=True)
+
+    def test_single_argument_parse(self):
+        assert self.ip.parse('1 2') == [1, '2']
+
+
+class UncacheableCast:
+    cacheable = False
+
+    @staticmethod
+    def type_cast(item):
+        return item
+
+
+class TestParseCache:
+
+    def test_results_are_tuples(self):
+        ip = InputParser(NumberCast, cache_size=10)
+        assert ip.parse('1 2', recurse=True) == (1, 2)
+        assert ip.parse('1 2') == (1, '2')
+
+    @pytest.mark.parametrize('policy', ['lru', 'fifo'])
+    def test_cache_info(self, policy):
+        ip = InputParser(NumberCast, cache_size=2, cache_policy=policy)
+        for s in ['a', 'b', 'a', 'c']:
+            ip.parse(s)
+
+        assert ip.cache_info() == (1, 3, 2, 2)
+        ip.cache_clear()
+        assert ip.cache_info() == (0, 0, 2, 0)
+
+    @pytest.mark.parametrize('policy,evicted', [('lru', 'b'), ('fifo', 'a')])
+    def test_policy(self, policy, evicted):
+        ip = InputParser(cache_size=2, cache_policy=policy)
+        for s in ['a', 'b', 'a', 'c', evicted]:
+            ip.parse(s)
+
+        assert ip.cache_info().hits == 1
+
+    def test_disabled(self):
+        ip = InputParser(NumberCast)
+        assert ip.parse('1', recurse=True) == [1]
+        assert ip.cache_info() == (0, 0, 0, 0)
+
+    def test_uncacheable_cast(self):
+        ip = InputParser(UncacheableCast, cache_size=10)
+        ip.parse('a')
+        assert ip.cache_info().maxsize == 0
+
+    def test_packed_arrays_not_shared(self):
+        ip = InputParser(NumberCast, pack_numbers=True, cache_size=10)
+        ip.parse('1 2', recurse=True)[0][0] = 5
+        assert ip.parse('1 2', recurse=True) == (array('q', [1, 2]),)
+
+    def test_kwargs_not_shared(self):
+        ip = InputParser(KwargCast, NumberCast, cache_size=10)
+        ip.parse('a --x=1', recurse=True)[1].value(99)
+        ip.parse('--x=1')[0].value(99)
+
+        result = ip.parse('a --x=1', recurse=True)
+        assert result[1].key() == 'x' and result[1].value() == 1
+        assert ip.parse('--x=1')[0].value() == 1
+        assert ip.cache_info().hits == 2
+
+    @pytest.mark.parametrize('kwargs', [{'cache_size': -1},
+                                        {'cache_policy': 'random'}])
+    def test_bad_options_raise(self, kwargs):
+        with pytest.raises(ValueError):
+            InputParser(**kwargs)
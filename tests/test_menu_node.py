@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
 
 import itertools
+from array import array
 
-from prompt_smart_menu.helpers import InvalidArgError, Kwarg, NestedDict
+from prompt_smart_menu.helpers import (ChoiceSet, InvalidArgError, Kwarg,
+                                       NestedDict)
+from prompt_smart_menu.input_parser import InputParser, KwargCast, NumberCast
 from prompt_smart_menu.smart_menu import MenuNode
 
 import pytest
@@ -12,6 +15,10 @@ def dummy(*args, **kwargs):
     pass
 
 
+def echo(*args, **kwargs):
+    return (args, kwargs)
+
+
 class TestMenuNode:
     _nest = {'prompt': {'toolkit', 'menu'}, 'exit': None}
 
@@ -36,6 +43,36 @@ class TestMenuNode:
         MenuNode(**no_func)
         MenuNode(**no_child)
 
+    def test_init_command_not_string_raises(self):
+        with pytest.raises(TypeError):
+            MenuNode(command=1, function=dummy)
+
+    def test_init_children_stored_compactly(self):
+        node = {'command': 'test', 'function': dummy,
+                'children': ['prompt', 'menu']}
+        menu_node = MenuNode(**node)
+
+        assert not hasattr(menu_node, '__dict__')
+        assert menu_node._children == ('prompt', 'menu')
+
+    def test_init_settings_shared(self):
+        parser = InputParser()
+        children = [{'command': 'a', 'function': dummy},
+                    {'command': 'b', 'function': dummy},
+                    {'command': 'c', 'function': dummy, 'stream_args': True},
+                    {'command': 'd', 'children': [{'command': 'e',
+                                                   'function': dummy}]}]
+        menu_node = MenuNode(command='test', children=children,
+                             parser=parser)
+        a, b, c, d = menu_node._children
+
+        assert isinstance(a, MenuNode) and isinstance(d, MenuNode)
+        assert a._settings is b._settings is d._settings
+        assert a._settings is menu_node._settings
+        assert c._settings is not a._settings
+        assert c._settings.stream_args and c._settings.parser is parser
+        assert not hasattr(a, '_revision') and hasattr(d, '_revision')
+
     def test_init_children_none_no_function_raises(self):
         node = {'command': 'test', 'function': None, 'children': None}
         with pytest.raises(TypeError):
@@ -130,6 +167,38 @@ class TestMenuNode:
         assert MenuNode(**node).get_menu() == expected
 
 
+@pytest.fixture
+def tree_node():
+    leaf = {'command': 'leaf', 'function': dummy}
+    children = [{'command': 'a', 'children': [leaf]},
+                {'command': 'b', 'children': [leaf.copy()]}]
+    return MenuNode(command='test', children=children)
+
+
+class TestMenuNodeGetMenuCache:
+
+    def test_get_menu_cached(self, tree_node):
+        assert tree_node.get_menu() is tree_node.get_menu()
+
+    def test_add_child_invalidates_path(self, tree_node):
+        menu = tree_node.get_menu()
+        sibling_menu = menu['test']['b']
+
+        tree_node._child_index['a'].add_child(
+            {'command': 'new', 'function': dummy})
+
+        updated = tree_node.get_menu()
+        assert updated is not menu
+        assert updated['test']['a'] == {'leaf': None, 'new': None}
+        assert updated['test']['b'] is sibling_menu
+
+    def test_remove_child_invalidates_path(self, tree_node):
+        tree_node.get_menu()
+        tree_node.remove_child('a')
+
+        assert tree_node.get_menu() == {'test': {'b': {'leaf': None}}}
+
+
 class TestMenuNodeProcessArg:
 
     def test_no_function_no_args(self):
@@ -162,6 +231,332 @@ class TestMenuNodeProcessArg:
         assert menu_node.process_arg('child') == 42
 
 
+class TestMenuNodeStreamArgs:
+
+    def test_function_receives_iterator(self):
+        node = {'command': 'test', 'function': lambda args: args,
+                'stream_args': True}
+        result = MenuNode(**node).process_arg('prompt "smart menu"')
+
+        assert not isinstance(result, list)
+        assert list(result) == ['prompt', 'smart menu']
+
+    def test_validate_args(self):
+        node = {'command': 'test', 'function': no_args_func,
+                'stream_args': True, 'validate_args': True}
+
+        with pytest.raises(InvalidArgError):
+            MenuNode(**node).process_arg('prompt')
+
+    def test_no_function_raises(self):
+        child = {'command': 'child', 'function': dummy}
+        node = {'command': 'test', 'children': [child], 'stream_args': True}
+
+        with pytest.raises(TypeError):
+            MenuNode(**node)
+
+
+@pytest.fixture
+def children_node():
+    children = [{'command': 'a', 'function': lambda: 'a'},
+                {'command': 'b', 'function': lambda: 'b'}]
+    return MenuNode(command='test', children=children)
+
+
+class TestMenuNodeChildren:
+
+    def test_add_child(self, children_node):
+        children_node.add_child({'command': 'c', 'function': lambda: 'c'})
+
+        assert children_node.process_arg('c') == 'c'
+        assert 'c' in children_node.get_menu()['test']
+
+    def test_add_child_duplicate_raises(self, children_node):
+        with pytest.raises(TypeError):
+            children_node.add_child({'command': 'a', 'function': dummy})
+
+    def test_add_child_to_end_point_raises(self):
+        menu_node = MenuNode(command='test', function=dummy)
+
+        with pytest.raises(TypeError):
+            menu_node.add_child({'command': 'a', 'function': dummy})
+
+    def test_remove_child(self, children_node):
+        children_node.remove_child('a')
+
+        assert children_node.get_menu() == {'test': {'b': None}}
+        with pytest.raises(InvalidArgError):
+            children_node.process_arg('a')
+
+    def test_remove_child_missing_raises(self, children_node):
+        with pytest.raises(KeyError):
+            children_node.remove_child('c')
+
+    def test_remove_last_child_raises(self, children_node):
+        children_node.remove_child('a')
+
+        with pytest.raises(ValueError):
+            children_node.remove_child('b')
+
+
+@pytest.fixture
+def aliases_node(request):
+    children = [{'command': 'show', 'aliases': ['display'],
+                 'function': lambda: 'show'},
+                {'command': 'shutdown', 'function': lambda: 'shutdown'},
+                {'command': 'status', 'aliases': ['st'],
+                 'function': lambda: 'status'}]
+    return MenuNode(command='test', children=children,
+                    **getattr(request, 'param', {}))
+
+
+class TestMenuNodeAliases:
+
+    def test_alias(self, aliases_node):
+        assert aliases_node.process_arg('display') == 'show'
+        assert aliases_node.process_arg('st') == 'status'
+        assert 'display' not in aliases_node.get_menu()['test']
+
+    @pytest.mark.parametrize('names', [
+        {'command': 'show'},
+        {'command': 'other', 'aliases': ['st']},
+        {'command': 'other', 'aliases': ['shutdown']},
+        {'command': 'other', 'aliases': ['x', 'x']},
+        {'command': 'other', 'aliases': ['other']},
+    ])
+    def test_duplicate_raises(self, aliases_node, names):
+        with pytest.raises(TypeError):
+            aliases_node.add_child({'function': dummy, **names})
+
+    @pytest.mark.parametrize('aliases', ['display', [1]])
+    def test_bad_aliases_raise(self, aliases):
+        with pytest.raises(TypeError):
+            MenuNode(command='test', function=dummy, aliases=aliases)
+
+    def test_remove_child_removes_aliases(self, aliases_node):
+        aliases_node.remove_child('status')
+
+        with pytest.raises(InvalidArgError):
+            aliases_node.process_arg('st')
+
+    def test_prefix_disabled(self, aliases_node):
+        with pytest.raises(InvalidArgError, match='not found'):
+            aliases_node.process_arg('stat')
+
+    @pytest.mark.parametrize('aliases_node', [{'prefix_match': True}],
+                             indirect=True)
+    @pytest.mark.parametrize('prefix,result', [
+        ('sho', 'show'), ('shu', 'shutdown'), ('sta', 'status'),
+        ('d', 'show'), ('s', None), ('sh', None), ('x', None)])
+    def test_prefix(self, aliases_node, prefix, result):
+        if result is None:
+            with pytest.raises(InvalidArgError):
+                aliases_node.process_arg(prefix)
+        else:
+            assert aliases_node.process_arg(prefix) == result
+
+    @pytest.mark.parametrize('aliases_node', [{'prefix_match': True}],
+                             indirect=True)
+    def test_exact_match_wins(self, aliases_node):
+        # 'sh' is also a prefix of show and shutdown
+        aliases_node.add_child({'command': 'sh', 'function': lambda: 'sh'})
+
+        assert aliases_node.process_arg('sh') == 'sh'
+
+    @pytest.mark.parametrize('aliases_node', [{'prefix_match': True}],
+                             indirect=True)
+    def test_ambiguous_lists_candidates(self, aliases_node):
+        with pytest.raises(InvalidArgError,
+                           match='Candidates: show, shutdown$'):
+            aliases_node.process_arg('sh')
+
+    def test_ambiguous_candidates_limited(self):
+        children = [{'command': f'item{i}', 'function': dummy}
+                    for i in range(1000)]
+        menu_node = MenuNode(command='test', children=children,
+                             prefix_match=True)
+
+        with pytest.raises(InvalidArgError) as e:
+            menu_node.process_arg('item')
+        assert str(e.value).endswith('item0, item1, item10, item100, '
+                                     'item101, item102, item103, item104, '
+                                     'item105, item106, ...')
+        menu_node.process_arg('item999')
+
+    def test_prefix_inherited(self):
+        children = [{'command': 'show', 'children': [
+            {'command': 'status', 'function': lambda: 'status'}]}]
+        menu_node = MenuNode(command='test', children=children,
+                             prefix_match=True)
+
+        assert menu_node.process_arg('sh sta') == 'status'
+
+    @pytest.mark.parametrize('aliases_node', [{'prefix_match': True}],
+                             indirect=True)
+    def test_prefix_index_updated(self, aliases_node):
+        assert aliases_node.process_arg('shu') == 'shutdown'
+        aliases_node.add_child({'command': 'shuffle',
+                                'function': lambda: 'shuffle'})
+
+        with pytest.raises(InvalidArgError):
+            aliases_node.process_arg('shu')
+        aliases_node.remove_child('shutdown')
+        assert aliases_node.process_arg('shu') == 'shuffle'
+
+    def test_lazy(self):
+        children = [{'command': 'show', 'aliases': ['display'],
+                     'function': lambda: 'show'},
+                    {'command': 'bad', 'function': 'not callable'}]
+        menu_node = MenuNode(command='test', children=children, lazy=True,
+                             prefix_match=True)
+
+        assert menu_node.process_arg('display') == 'show'
+        assert menu_node.process_arg('disp') == 'show'
+
+
+@pytest.fixture
+def suggestions_node(request):
+    children = [{'command': 'show', 'aliases': ['display'],
+                 'function': lambda: 'show'},
+                {'command': 'shell', 'function': lambda: 'shell'},
+                {'command': 'status', 'function': lambda: 'status'},
+                {'command': 'stats', 'function': lambda: 'stats'}]
+    return MenuNode(command='test', children=children,
+                    **getattr(request, 'param', {}))
+
+
+class TestMenuNodeSuggestions:
+
+    @pytest.mark.parametrize('command,suggested', [
+        ('shwo', 'show'), ('dispaly', 'show'), ('shel', 'shell'),
+        ('stat', 'stats'), ('statu', 'stats, status')])
+    def test_suggestions(self, suggestions_node, command, suggested):
+        with pytest.raises(InvalidArgError,
+                           match=f'not found: {command}. '
+                                 f'Did you mean: {suggested}\\?$'):
+            suggestions_node.process_arg(command)
+
+    def test_no_suggestions(self, suggestions_node):
+        with pytest.raises(InvalidArgError, match='not found: xyz$'):
+            suggestions_node.process_arg('xyz')
+
+    @pytest.mark.parametrize('suggestions_node', [{'fuzzy_match': True}],
+                             indirect=True)
+    @pytest.mark.parametrize('command,result', [
+        ('shwo', 'show'), ('dispaly', 'show'), ('SHELL', 'shell'),
+        ('stat', 'stats')])
+    def test_fuzzy_match(self, suggestions_node, command, result):
+        assert suggestions_node.process_arg(command) == result
+
+    @pytest.mark.parametrize('suggestions_node', [{'fuzzy_match': True}],
+                             indirect=True)
+    def test_fuzzy_match_ambiguous_raises(self, suggestions_node):
+        with pytest.raises(InvalidArgError,
+                           match='Did you mean: stats, status'):
+            suggestions_node.process_arg('statu')
+
+    def test_fuzzy_match_inherited(self):
+        children = [{'command': 'show', 'children': [
+            {'command': 'status', 'function': lambda: 'status'}]}]
+        menu_node = MenuNode(command='test', children=children,
+                             fuzzy_match=True)
+
+        assert menu_node.process_arg('shwo staus') == 'status'
+
+    def test_index_updated(self, suggestions_node):
+        with pytest.raises(InvalidArgError, match='not found: shwo.'):
+            suggestions_node.process_arg('shwo')
+        suggestions_node.remove_child('show')
+
+        with pytest.raises(InvalidArgError, match='not found: shwo$'):
+            suggestions_node.process_arg('shwo')
+
+
+@pytest.fixture
+def choices_node(request):
+    children = [{'command': 'ssh', 'function': dummy,
+                 'children': ['host1', 'host2', '22']},
+                {'command': 'free', 'function': dummy}]
+    return MenuNode(command='test', children=children,
+                    parser=InputParser(KwargCast, NumberCast),
+                    **getattr(request, 'param', {}))
+
+
+class TestMenuNodeChoices:
+
+    def test_disabled_by_default(self, choices_node):
+        assert choices_node.process_arg('ssh other') is None
+
+    @pytest.mark.parametrize('choices_node', [{'validate_choices': True}],
+                             indirect=True)
+    @pytest.mark.parametrize('command', ['ssh host1', 'ssh host2 host1',
+                                         'ssh 22', 'ssh host1 --port=22',
+                                         'ssh', 'free anything'])
+    def test_valid(self, choices_node, command):
+        choices_node.process_arg(command)
+
+    @pytest.mark.parametrize('choices_node', [{'validate_choices': True}],
+                             indirect=True)
+    @pytest.mark.parametrize('command,message', [
+        ('ssh host3', 'Invalid choice: host3$'),
+        ('ssh host1 other', 'Invalid choice: other$'),
+        ('ssh 22.0', 'Invalid choice: 22.0$'),
+        ('ssh "--port=22"', 'Invalid choice: --port=22$')])
+    def test_invalid_raises(self, choices_node, command, message):
+        with pytest.raises(InvalidArgError, match=message):
+            choices_node.process_arg(command)
+
+    def test_checked_before_cast(self):
+        menu_node = MenuNode(command='pick', function=echo,
+                             children=['01', '02'],
+                             parser=InputParser(NumberCast),
+                             validate_choices=True)
+
+        assert menu_node.process_arg('01 02') == ((1, 2), {})
+        with pytest.raises(InvalidArgError, match='Invalid choice: 1$'):
+            menu_node.process_arg('1')
+
+    def test_packed_numbers(self):
+        menu_node = MenuNode(command='pick', function=echo,
+                             children=['1', '2'],
+                             parser=InputParser(NumberCast,
+                                                pack_numbers=True),
+                             validate_choices=True)
+
+        assert menu_node.process_arg('1 2') == ((array('q', [1, 2]),), {})
+        with pytest.raises(InvalidArgError, match='Invalid choice: 3$'):
+            menu_node.process_arg('1 3')
+
+    def test_custom_parser_checks_parsed_args(self):
+        class Parser:
+            @staticmethod
+            def parse(args_str, recurse=False):
+                return [arg.upper() for arg in args_str.split()]
+
+        menu_node = MenuNode(command='pick', function=echo,
+                             children=['A'], parser=Parser(),
+                             validate_choices=True)
+
+        assert menu_node.process_arg('a') == (('A',), {})
+        with pytest.raises(InvalidArgError, match='Invalid choice: B$'):
+            menu_node.process_arg('b')
+
+    @pytest.mark.parametrize('choices_node', [{'validate_choices': True}],
+                             indirect=True)
+    def test_choices_shared_with_menu(self, choices_node):
+        ssh = choices_node._get_child('ssh')
+        choices = choices_node.get_menu()['test']['ssh']
+        choices_node.add_child({'command': 'new', 'function': dummy})
+
+        assert isinstance(choices, ChoiceSet)
+        assert choices == {'host1', 'host2', '22'}
+        assert choices_node.get_menu()['test']['ssh'] is choices
+        assert ssh._choice_set() is choices
+        assert ssh._choices is choices
+        with pytest.raises(TypeError):
+            choices.add('host3')
+
+
 class TestMenuNodeSplitKwargs:
 
     def test_empty(self):
@@ -298,6 +693,13 @@ class TestValidateFunctionArgs:
     def test_var_keyword(self, letters, number_args):
         self.template_test(var_keyword, letters, number_args)
 
+    def test_validator_recompiled_when_function_changes(self):
+        mn = MenuNode(command='test', function=no_args_func)
+        mn._validate_function_args([])
+
+        mn._function = var_positional
+        mn._validate_function_args([1, 2])
+
     @pytest.mark.parametrize('func,exception',
                              [(var_keyword, InvalidArgError),
                               (keyword_only, InvalidArgError)])
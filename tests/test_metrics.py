@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+from prompt_smart_menu import PromptSmartMenu
+from prompt_smart_menu.helpers import InvalidArgError
+from prompt_smart_menu.metrics import Histogram, MenuMetrics
+
+import pytest
+
+
+def dummy(*args, **kwargs):
+    return (args, kwargs)
+
+
+def fail():
+    raise RuntimeError('failed')
+
+
+def report(year, *, fmt='txt'):
+    return (year, fmt)
+
+
+@pytest.fixture
+def menu():
+    config = [{'command': 'show',
+               'children': [{'command': 'ip', 'function': dummy},
+                            {'command': 'fail', 'function': fail}]},
+              {'command': 'report', 'function': report,
+               'validate_args': True}]
+    return PromptSmartMenu(config)
+
+
+class TestHistogram:
+
+    def test_buckets(self):
+        histogram = Histogram((0.1, 1.0))
+        for seconds in (0.05, 0.1, 0.5, 2.0, 3.0):
+            histogram.add(seconds)
+
+        assert histogram.as_dict() == {'count': 5,
+                                       'total': pytest.approx(5.65),
+                                       'max': 3.0,
+                                       'bounds': [0.1, 1.0],
+                                       'counts': [2, 1, 2]}
+
+
+class TestMenuMetrics:
+
+    def test_disabled_by_default(self, menu):
+        assert menu.metrics is None
+        menu.run('show ip')
+        assert menu.metrics is None
+
+    def test_records_by_path(self, menu):
+        metrics = menu.enable_metrics()
+        menu.run('show ip a')
+        menu.run('show ip b')
+        menu.run('report 2020')
+
+        snapshot = metrics.snapshot()
+        assert set(snapshot) == {'show ip', 'report'}
+        ip = snapshot['show ip']
+        assert ip['calls'] == 2
+        assert ip['errors'] == 0
+        assert ip['parse']['count'] == 2
+        assert ip['validate']['count'] == 0
+        assert ip['execute']['count'] == 2
+        assert sum(ip['execute']['counts']) == 2
+        assert snapshot['report']['validate']['count'] == 1
+
+    def test_errors(self, menu):
+        metrics = menu.enable_metrics()
+        with pytest.raises(RuntimeError):
+            menu.run('show fail')
+        with pytest.raises(InvalidArgError):
+            menu.run('report')
+
+        snapshot = metrics.snapshot()
+        assert snapshot['show fail']['errors'] == 1
+        assert snapshot['show fail']['execute']['count'] == 1
+        assert snapshot['report']['calls'] == 1
+        assert snapshot['report']['errors'] == 1
+        assert snapshot['report']['execute']['count'] == 0
+
+    def test_reset(self, menu):
+        metrics = menu.enable_metrics()
+        menu.run('show ip')
+        metrics.reset()
+        assert metrics.snapshot() == {}
+        menu.run('show ip')
+        assert metrics.snapshot()['show ip']['calls'] == 1
+
+    def test_disable(self, menu):
+        metrics = menu.enable_metrics()
+        menu.run('show ip')
+        assert menu.disable_metrics() is metrics
+        menu.run('show ip')
+        assert menu.metrics is None
+        assert metrics.snapshot()['show ip']['calls'] == 1
+
+    def test_push_every(self, menu):
+        pushed = []
+        menu.enable_metrics(callback=pushed.append, push_every=2)
+        for _ in range(5):
+            menu.run('show ip')
+
+        assert [s['show ip']['calls'] for s in pushed] == [2, 2]
+        assert menu.metrics.snapshot()['show ip']['calls'] == 1
+
+    def test_push_without_callback_raises(self, menu):
+        with pytest.raises(ValueError):
+            menu.enable_metrics().push()
+        with pytest.raises(ValueError):
+            menu.enable_metrics(push_every=10)
+
+    @pytest.mark.parametrize('buckets', [(), (1.0, 0.1), (0.1, 0.1)])
+    def test_bad_buckets_raise(self, buckets):
+        with pytest.raises(ValueError):
+            MenuMetrics(buckets)
+
+    def test_run_many_and_compiled(self, menu):
+        metrics = menu.enable_metrics()
+        menu.compile()
+        list(menu.run_many(['show ip 1', 'show ip 2', 'report x']))
+        assert metrics.snapshot()['show ip']['calls'] == 2
+
+    def test_thread_execution(self):
+        config = [{'command': 'test', 'function': dummy,
+                   'execution': 'thread'}]
+        with PromptSmartMenu(config) as psm:
+            metrics = psm.enable_metrics()
+            psm.run('test').result()
+        assert metrics.snapshot()['test']['execute']['count'] == 1
+
+    def test_run_async(self, menu):
+        metrics = menu.enable_metrics()
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(menu.run_async('show ip'))
+        finally:
+            loop.close()
+        assert metrics.snapshot()['show ip']['execute']['count'] == 1
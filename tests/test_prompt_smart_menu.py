@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
 
+import asyncio
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
 from prompt_smart_menu import PromptSmartMenu
 from prompt_smart_menu.helpers import InvalidArgError
 from prompt_smart_menu.input_parser import InputParser, KwargCast, NumberCast
@@ -88,6 +93,265 @@ class TestPromptSmartMenu:
         assert menu_fixture.run('tree leaf prompt') == (('leaf', 'prompt'), {})
 
 
+class TestCompiledMenu:
+
+    def test_run_compiled(self, menu_fixture):
+        menu_fixture.compile()
+
+        assert menu_fixture.run('root') == (('root',), {})
+        assert menu_fixture.run(' tree  leaf prompt ') == (
+            ('leaf', 'prompt'), {})
+        assert menu_fixture.run('"tree" leaf') == (('leaf',), {})
+
+    @pytest.mark.parametrize('command', ['', 'tree', 'tree branch', 'leaf'])
+    def test_run_compiled_raises(self, menu_fixture, command):
+        menu_fixture.compile()
+
+        with pytest.raises(InvalidArgError):
+            menu_fixture.run(command)
+
+    def test_recompiles_after_change(self, menu_fixture):
+        menu_fixture.compile()
+        menu_fixture._root._child_index['tree'].add_child(
+            {'command': 'twig', 'function': dummy_wrapper('twig')})
+
+        assert menu_fixture.run('tree twig') == (('twig',), {})
+
+    def test_uncastable_command_not_compiled(self):
+        menu = [{'command': '2', 'function': dummy}]
+        psm = PromptSmartMenu(menu, parser=InputParser(NumberCast))
+        psm.compile()
+
+        with pytest.raises(InvalidArgError):
+            psm.run('2')
+
+
+class TestRunMany:
+
+    def test_results(self, menu_fixture):
+        commands = ['root', 'tree leaf a', 'tree leaf b', 'tree leaf',
+                    'tree\tleaf c', 'tree leafy', 'root d']
+        results = list(menu_fixture.run_many(commands))
+
+        assert results[:5] == [(True, (('root',), {})),
+                               (True, (('leaf', 'a'), {})),
+                               (True, (('leaf', 'b'), {})),
+                               (True, (('leaf',), {})),
+                               (True, (('leaf', 'c'), {}))]
+        assert results[5][0] is False
+        assert isinstance(results[5][1], InvalidArgError)
+        assert results[6] == (True, (('root', 'd'), {}))
+
+    def test_stop_on_error(self, menu_fixture):
+        commands = ['root', 'tree', 'root']
+        results = list(menu_fixture.run_many(commands, stop_on_error=True))
+
+        assert len(results) == 2
+        assert results[1][0] is False
+
+    def test_menu_changes_between_commands(self, menu_fixture):
+        tree = menu_fixture._root._child_index['tree']
+
+        def commands():
+            yield 'tree leaf'
+            tree.add_child({'command': 'twig',
+                            'function': dummy_wrapper('twig')})
+            tree.remove_child('leaf')
+            yield 'tree leaf'
+
+        results = list(menu_fixture.run_many(commands()))
+        assert results[0] == (True, (('leaf',), {}))
+        assert results[1][0] is False
+
+
+class TestLazyMenu:
+
+    @staticmethod
+    def menu_config():
+        leaf = {'command': 'leaf', 'function': dummy_wrapper('leaf')}
+        broken = {'command': 'broken', 'children': ['not', 'nodes']}
+        return [{'command': 'tree', 'children': [leaf]},
+                {'command': 'bad', 'children': [broken]},
+                {'command': 'dup', 'children': [leaf, leaf]}]
+
+    def test_invalid_branches_not_built(self):
+        psm = PromptSmartMenu(self.menu_config(), lazy=True)
+
+        assert psm.run('tree leaf a') == (('leaf', 'a'), {})
+        assert isinstance(psm._root._child_index['bad'], dict)
+
+    @pytest.mark.parametrize('command', ['bad broken', 'dup leaf'])
+    def test_invalid_branch_raises_on_dispatch(self, command):
+        psm = PromptSmartMenu(self.menu_config(), lazy=True)
+
+        with pytest.raises(TypeError):
+            psm.run(command)
+
+    def test_validate_all_raises(self):
+        psm = PromptSmartMenu(self.menu_config(), lazy=True)
+
+        with pytest.raises(TypeError):
+            psm.validate_all()
+
+    def test_invalid_branch_raises_on_every_access(self):
+        a = {'command': 'a', 'function': dummy}
+        b = {'command': 'b', 'function': dummy}
+        psm = PromptSmartMenu([a, a, b], lazy=True)
+
+        for command in ['a', 'a', 'b']:
+            with pytest.raises(TypeError):
+                psm.run(command)
+        with pytest.raises(TypeError):
+            psm.validate_all()
+        with pytest.raises(TypeError):
+            psm.nested_completer_dict()
+
+    def test_validate_all_signature(self):
+        menu = [{'command': 'test', 'function': dummy,
+                 'children': ['a']}]
+        psm = PromptSmartMenu(menu, validate_args=True, lazy=True)
+        psm.validate_all()
+
+        assert psm._root._get_child('test')._validator is not None
+
+    def test_materialize(self):
+        config = self.menu_config()[:1]
+        psm = PromptSmartMenu(config, lazy=True)
+        psm.materialize()
+
+        assert psm._root._materialized
+        assert psm._root._children[0]._materialized
+        assert psm.nested_completer_dict() == {'tree': {'leaf': None}}
+
+    def test_config_not_modified(self):
+        config = self.menu_config()
+        PromptSmartMenu(config[:1], validate_args=True).run('tree leaf')
+
+        assert config[0] == {'command': 'tree',
+                             'children': [{'command': 'leaf',
+                                           'function': config[0]['children'][
+                                               0]['function']}]}
+
+    def test_settings_inherited(self):
+        leaf = {'command': 'leaf', 'function': dummy}
+        config = [{'command': 'tree', 'children': [leaf]}]
+        psm = PromptSmartMenu(config, parser=InputParser(NumberCast),
+                              lazy=True)
+
+        assert psm.run('tree leaf 1') == ((1,), {})
+
+
+def run_coroutine(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TestRunAsync:
+
+    def test_plain_function(self, menu_fixture):
+        result = run_coroutine(menu_fixture.run_async('tree leaf a'))
+        assert result == (('leaf', 'a'), {})
+
+    def test_coroutine_function(self):
+        async def endpoint(*args):
+            await asyncio.sleep(0)
+            return args
+
+        psm = PromptSmartMenu([{'command': 'test', 'function': endpoint}])
+        assert run_coroutine(psm.run_async('test a b')) == ('a', 'b')
+
+    def test_raises(self, menu_fixture):
+        with pytest.raises(InvalidArgError):
+            run_coroutine(menu_fixture.run_async('tree'))
+
+    def test_executor(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        menu = [{'command': 'test',
+                 'function': lambda: threading.current_thread()}]
+        psm = PromptSmartMenu(menu, executor=executor)
+
+        thread = run_coroutine(psm.run_async('test'))
+        executor.shutdown()
+        assert thread is not threading.current_thread()
+        assert thread.name.startswith('ThreadPoolExecutor')
+
+    def test_max_concurrency(self):
+        running = []
+        peak = []
+
+        async def endpoint():
+            running.append(None)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+
+        psm = PromptSmartMenu([{'command': 'test', 'function': endpoint}],
+                              max_concurrency=2)
+
+        async def run_all():
+            await asyncio.gather(*[psm.run_async('test') for _ in range(6)])
+
+        run_coroutine(run_all())
+        assert max(peak) == 2
+
+
+class TestExecutionModes:
+
+    def test_thread_returns_future(self):
+        menu = [{'command': 'test', 'function': dummy, 'execution': 'thread'}]
+        with PromptSmartMenu(menu) as psm:
+            future = psm.run('test a')
+            assert isinstance(future, Future)
+            assert future.result() == (('a',), {})
+
+    def test_process_returns_future(self):
+        menu = [{'command': 'pid', 'function': os.getpid}]
+        with PromptSmartMenu(menu, execution='process',
+                             max_workers=1) as psm:
+            assert psm.run('pid').result() != os.getpid()
+
+    def test_execution_inherited(self):
+        child = {'command': 'leaf', 'function': dummy}
+        menu = [{'command': 'tree', 'children': [child]},
+                {'command': 'inline', 'function': dummy,
+                 'execution': 'inline'}]
+        with PromptSmartMenu(menu, execution='thread') as psm:
+            assert psm.run('tree leaf').result() == ((), {})
+            assert psm.run('inline') == ((), {})
+
+    @pytest.mark.parametrize('function', [lambda: 42,
+                                          threading.Lock().acquire])
+    def test_process_unpicklable_function_raises(self, function):
+        menu = [{'command': 'test', 'function': function}]
+        with pytest.raises(TypeError):
+            PromptSmartMenu(menu, execution='process')
+
+    def test_bad_execution_raises(self):
+        menu = [{'command': 'test', 'function': dummy, 'execution': 'gpu'}]
+        with pytest.raises(ValueError):
+            PromptSmartMenu(menu)
+
+    def test_run_async_uses_pool(self):
+        menu = [{'command': 'test',
+                 'function': lambda: threading.current_thread(),
+                 'execution': 'thread'}]
+        with PromptSmartMenu(menu, max_workers=1) as psm:
+            thread = run_coroutine(psm.run_async('test'))
+            assert thread is not threading.current_thread()
+
+    def test_shutdown_restarts_pool(self):
+        menu = [{'command': 'test', 'function': dummy, 'execution': 'thread'}]
+        psm = PromptSmartMenu(menu)
+        psm.run('test').result()
+        psm.shutdown()
+
+        assert psm.run('test').result() == ((), {})
+        psm.shutdown()
+
+
 def dummy_no_args():
     pass
 
@@ -125,6 +389,49 @@ def complex_menu_fixture():
                            validate_args=True)
 
 
+class TestCachedParser:
+
+    def test_run(self):
+        parser = InputParser(KwargCast, NumberCast, cache_size=100)
+        menu = [{'command': 'tree',
+                 'children': [{'command': 'leaf', 'function': dummy}]}]
+        psm = PromptSmartMenu(menu, parser=parser, validate_args=True)
+
+        for _ in range(3):
+            assert psm.run('tree leaf 1 --k=2') == ((1,), {'k': 2})
+        assert parser.cache_info().hits > 0
+
+
+class TestPrefixMatch:
+
+    @pytest.fixture
+    def menu(self):
+        menu_config = [{'command': 'show', 'aliases': ['display'],
+                        'children': [
+                            {'command': 'status', 'function': dummy},
+                            {'command': 'startup', 'function': dummy}]},
+                       {'command': 'shutdown', 'function': dummy}]
+        return PromptSmartMenu(menu_config, prefix_match=True)
+
+    @pytest.mark.parametrize('compiled', [False, True])
+    def test_run(self, menu, compiled):
+        if compiled:
+            menu.compile()
+
+        assert menu.run('sho stat x') == (('x',), {})
+        assert menu.run('display status') == ((), {})
+        with pytest.raises(InvalidArgError, match='startup, status'):
+            menu.run('show st')
+
+    def test_run_many(self, menu):
+        results = list(menu.run_many(['sho status 1', 'show status 2',
+                                      'sh status']))
+
+        assert results[0] == (True, (('1',), {}))
+        assert results[1] == (True, (('2',), {}))
+        assert not results[2][0]
+
+
 class TestComplexMenu:
     def test_root(self, complex_menu_fixture):
         result = complex_menu_fixture.run('root')
@@ -155,3 +462,12 @@ class TestComplexMenu:
     def test_validate_args_overwrites(self, complex_menu_fixture):
         with pytest.raises(TypeError):
             complex_menu_fixture.run(f'tree no_validate error')
+
+    def test_compiled(self, complex_menu_fixture):
+        complex_menu_fixture.compile()
+
+        assert complex_menu_fixture.run('tree dummy 9 --key=val') == (
+            (9,), {'key': 'val'})
+        assert complex_menu_fixture.run('tree all_str 9') == (('9',), {})
+        with pytest.raises(InvalidArgError):
+            complex_menu_fixture.run('root extra')
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+
+from prompt_smart_menu import ChildrenProvider, PromptSmartMenu
+
+import pytest
+
+
+def dummy(*args, **kwargs):
+    return (args, kwargs)
+
+
+def hosts():
+    return ['db1', 'web1', 'web2']
+
+
+class Counter:
+    """A provider function returning new strings on each call.
+
+    Unless opened, calls wait for release() so that tests see the strings
+    from before a background refresh.
+    """
+
+    def __init__(self, words=None, opened=True):
+        self.calls = 0
+        self.words = words
+        self.gate = threading.Event()
+        if opened:
+            self.gate.set()
+
+    def __call__(self):
+        assert self.gate.wait(5)
+        self.calls += 1
+        return self.words or [f'host{self.calls}']
+
+    def release(self):
+        self.gate.set()
+
+
+class TestChildrenProvider:
+
+    def test_fetched_in_background(self):
+        function = Counter(hosts(), opened=False)
+        provider = ChildrenProvider(function)
+
+        assert provider.words() == ()
+        function.release()
+        assert provider.wait(5)
+        assert provider.words() == ('db1', 'web1', 'web2')
+        stats = provider.stats()
+        assert (stats['hits'], stats['misses']) == (1, 1)
+        assert stats['refreshes'] == 1
+        assert stats['hit_rate'] == 0.5
+        assert stats['size'] == 3
+        assert stats['last_refresh_seconds'] >= 0
+
+    def test_never_blocks(self):
+        function = Counter(['late'], opened=False)
+        provider = ChildrenProvider(function)
+        try:
+            assert provider.words() == ()
+            assert provider.words() == ()
+            assert not provider.wait(0.01)
+        finally:
+            function.release()
+        assert provider.wait(5)
+        assert provider.words() == ('late',)
+        assert provider.stats()['refreshes'] == 1
+
+    def test_ttl(self):
+        counter = Counter()
+        provider = ChildrenProvider(counter, ttl=0)
+        provider.refresh()
+        counter.gate.clear()
+
+        # Expired, so the old strings are returned while refreshing
+        assert provider.words() == ('host1',)
+        counter.release()
+        provider.wait(5)
+        provider.ttl = None
+        assert provider.words() == ('host2',)
+
+    def test_no_ttl(self):
+        counter = Counter()
+        provider = ChildrenProvider(counter, ttl=None)
+        provider.refresh()
+        provider.words()
+
+        assert provider.wait(5)
+        assert counter.calls == 1
+
+    def test_not_strings_raises(self):
+        provider = ChildrenProvider(lambda: [1, 2])
+
+        with pytest.raises(TypeError):
+            provider.refresh()
+        assert provider.stats()['errors'] == 1
+
+    def test_max_size(self):
+        provider = ChildrenProvider(lambda: (str(i) for i in range(10 ** 9)),
+                                    max_size=2)
+        assert provider.refresh() == ('0', '1')
+
+    def test_error_keeps_strings(self):
+        results = [['a'], RuntimeError('down')]
+
+        def flaky():
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        provider = ChildrenProvider(flaky)
+        provider.refresh()
+        with pytest.raises(RuntimeError):
+            provider.refresh()
+
+        assert provider.words() == ('a',)
+        stats = provider.stats()
+        assert stats['errors'] == 1
+        assert isinstance(stats['last_error'], RuntimeError)
+
+    @pytest.mark.parametrize('kwargs', [{'function': 'hosts'},
+                                        {'function': hosts, 'ttl': -1},
+                                        {'function': hosts, 'max_size': -1}])
+    def test_bad_arguments_raise(self, kwargs):
+        with pytest.raises((TypeError, ValueError)):
+            ChildrenProvider(**kwargs)
+
+
+class TestMenuProviders:
+
+    def test_function_children(self):
+        function = Counter(hosts(), opened=False)
+        psm = PromptSmartMenu([{'command': 'ssh', 'function': dummy,
+                                'children': function}])
+        provider = psm._root._get_child('ssh')._children
+
+        assert isinstance(provider, ChildrenProvider)
+        assert psm.nested_completer_dict() == {'ssh': set()}
+        function.release()
+        provider.wait(5)
+        assert psm.nested_completer_dict() == {'ssh': {'db1', 'web1',
+                                                       'web2'}}
+
+    def test_ttl_expires_cached_menu(self):
+        counter = Counter()
+        provider = ChildrenProvider(counter, ttl=0.05)
+        psm = PromptSmartMenu([{'command': 'ssh', 'function': dummy,
+                                'children': provider}])
+        provider.refresh()
+        assert psm.nested_completer_dict() == {'ssh': {'host1'}}
+        assert psm.nested_completer_dict() == {'ssh': {'host1'}}
+
+        time.sleep(0.2)
+        counter.gate.clear()
+        # Expired, so reading the menu starts a refresh
+        assert psm.nested_completer_dict() == {'ssh': {'host1'}}
+        provider.ttl = None
+        counter.release()
+        assert provider.wait(5)
+        assert psm.nested_completer_dict() == {'ssh': {'host2'}}
+        assert counter.calls == 2
+
+    def test_refresh_rebuilds_cached_menu(self):
+        provider = ChildrenProvider(Counter(), ttl=None)
+        psm = PromptSmartMenu([{'command': 'remote', 'children': [
+            {'command': 'ssh', 'function': dummy, 'children': provider}]}])
+        threads = threading.active_count()
+        provider.refresh()
+        assert psm.nested_completer_dict() == {'remote': {'ssh': {'host1'}}}
+
+        provider.refresh()
+        assert psm.nested_completer_dict() == {'remote': {'ssh': {'host2'}}}
+        # Expiry is checked on read, without a thread per refresh
+        assert threading.active_count() == threads
+
+    def test_refresh_keeps_compiled_table(self):
+        provider = ChildrenProvider(Counter())
+        psm = PromptSmartMenu([{'command': 'ssh', 'function': dummy,
+                                'children': provider}])
+        psm.compile()
+        revision = psm._root._revision
+        provider.refresh()
+
+        assert psm._root._revision == revision
+        assert psm.nested_completer_dict() == {'ssh': {'host1'}}
+
+    def test_completer(self):
+        pytest.importorskip('prompt_toolkit')
+        from prompt_toolkit.completion import CompleteEvent
+        from prompt_toolkit.document import Document
+
+        function = Counter(hosts(), opened=False)
+        psm = PromptSmartMenu([{'command': 'ssh', 'function': dummy,
+                                'children': ChildrenProvider(function)}])
+        completer = psm.completer()
+
+        def complete(text):
+            return [c.text for c in completer.get_completions(
+                Document(text, len(text)), CompleteEvent())]
+
+        assert complete('ssh w') == []
+        function.release()
+        psm._root._get_child('ssh')._children.wait(5)
+        assert complete('ssh w') == ['web1', 'web2']
+
+    def test_children_nodes_raise(self):
+        with pytest.raises(TypeError):
+            PromptSmartMenu([{'command': 'ssh', 'children': hosts}])
+
+    def test_bad_children_raise(self):
+        with pytest.raises(TypeError):
+            PromptSmartMenu([{'command': 'ssh', 'function': dummy,
+                              'children': 5}])
+
+    def test_snapshot(self, tmp_path):
+        path = str(tmp_path / 'menu.json')
+        PromptSmartMenu([{'command': 'ssh', 'function': dummy,
+                          'children': ChildrenProvider(hosts, ttl=5,
+                                                       max_size=2)}]
+                        ).save_snapshot(path)
+        loaded = PromptSmartMenu.load_snapshot(path)
+        provider = loaded._root._get_child('ssh')._children
+
+        assert (provider.function, provider.ttl, provider.max_size) == (
+            hosts, 5, 2)
+        provider.refresh()
+        assert loaded.nested_completer_dict() == {'ssh': {'db1', 'web1'}}
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+import json
+from array import array
+
+from prompt_smart_menu import NestedDict, PromptSmartMenu
+from prompt_smart_menu.helpers import InvalidArgError
+from prompt_smart_menu.input_parser import InputParser, KwargCast, NumberCast
+
+import pytest
+
+
+def dummy(*args, **kwargs):
+    return (args, kwargs)
+
+
+def leaf(*args):
+    return ('leaf', *args)
+
+
+@pytest.fixture
+def menu_config():
+    return [
+        {
+            'command': 'tree',
+            'children': [
+                {'command': 'leaf', 'function': leaf,
+                 'children': ['a', 'b']},
+                {'command': 'str', 'function': dummy,
+                 'parser': InputParser()},
+            ]
+        },
+        {
+            'command': 'nest',
+            'function': dummy,
+            'validate_args': False,
+            'children': NestedDict({'ip': {'brief'}, 'exit': None}),
+        },
+        {
+            'command': 'stream',
+            'function': list,
+            'stream_args': True,
+        },
+    ]
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / 'menu.json')
+
+
+class TestSnapshot:
+
+    def test_round_trip(self, menu_config, snapshot_path):
+        psm = PromptSmartMenu(menu_config,
+                              parser=InputParser(KwargCast, NumberCast),
+                              validate_args=True)
+        psm.save_snapshot(snapshot_path)
+        loaded = PromptSmartMenu.load_snapshot(snapshot_path)
+
+        assert loaded.nested_completer_dict() == psm.nested_completer_dict()
+        assert loaded.run('tree leaf 1 2') == ('leaf', 1, 2)
+        assert loaded.run('tree str 1') == (('1',), {})
+        assert loaded.run('nest --k=2') == ((), {'k': 2})
+        assert loaded.run('stream a b') == ['a', 'b']
+        with pytest.raises(InvalidArgError):
+            loaded.run('tree leaf --k=1')
+
+    def test_parsers_shared(self, menu_config, snapshot_path):
+        PromptSmartMenu(menu_config).save_snapshot(snapshot_path)
+        with open(snapshot_path) as f:
+            assert len(json.load(f)['parsers']) == 2
+
+    def test_parser_options(self, snapshot_path):
+        parser = InputParser(NumberCast, pack_numbers=True)
+        PromptSmartMenu([{'command': 'ids', 'function': dummy}],
+                        parser=parser).save_snapshot(snapshot_path)
+        loaded = PromptSmartMenu.load_snapshot(snapshot_path)
+
+        assert loaded.run('ids 1 2') == ((array('q', [1, 2]),), {})
+
+    def test_aliases_and_matching(self, snapshot_path):
+        menu_config = [{'command': 'show', 'aliases': ['display'],
+                        'function': dummy},
+                       {'command': 'shutdown', 'function': dummy}]
+        PromptSmartMenu(menu_config, prefix_match=True, fuzzy_match=True
+                        ).save_snapshot(snapshot_path)
+        loaded = PromptSmartMenu.load_snapshot(snapshot_path)
+
+        assert loaded.run('disp 1') == (('1',), {})
+        assert loaded.run('shu') == ((), {})
+        assert loaded.run('shwo') == ((), {})
+        with pytest.raises(InvalidArgError):
+            loaded.run('sh')
+
+    def test_validate_choices(self, snapshot_path):
+        menu_config = [{'command': 'ssh', 'function': dummy,
+                        'children': ['host1']}]
+        PromptSmartMenu(menu_config, validate_choices=True
+                        ).save_snapshot(snapshot_path)
+        loaded = PromptSmartMenu.load_snapshot(snapshot_path)
+
+        assert loaded.run('ssh host1') == (('host1',), {})
+        with pytest.raises(InvalidArgError):
+            loaded.run('ssh host2')
+
+    def test_lazy_menu(self, menu_config, snapshot_path):
+        PromptSmartMenu(menu_config, lazy=True).save_snapshot(snapshot_path)
+        loaded = PromptSmartMenu.load_snapshot(snapshot_path)
+
+        assert loaded.run('tree leaf') == ('leaf',)
+
+    def test_mutable_after_load(self, menu_config, snapshot_path):
+        PromptSmartMenu(menu_config).save_snapshot(snapshot_path)
+        loaded = PromptSmartMenu.load_snapshot(snapshot_path)
+        loaded._root._get_child('tree').add_child(
+            {'command': 'twig', 'function': leaf})
+
+        assert loaded.run('tree twig') == ('leaf',)
+
+    def test_lambda_raises(self, snapshot_path):
+        psm = PromptSmartMenu([{'command': 'test', 'function': lambda: 1}])
+
+        with pytest.raises(TypeError):
+            psm.save_snapshot(snapshot_path)
+
+    def test_custom_parser_raises(self, snapshot_path):
+        class Parser:
+            @staticmethod
+            def parse(args_str, recurse=False):
+                return args_str.split()
+
+        psm = PromptSmartMenu([{'command': 'test', 'function': dummy}],
+                              parser=Parser())
+
+        with pytest.raises(TypeError, match='must be an InputParser'):
+            psm.save_snapshot(snapshot_path)
+
+    def test_bad_format_raises(self, snapshot_path):
+        with open(snapshot_path, 'w') as f:
+            json.dump({'format': 0}, f)
+
+        with pytest.raises(ValueError):
+            PromptSmartMenu.load_snapshot(snapshot_path)
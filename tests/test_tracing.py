@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+
+from prompt_smart_menu import PromptSmartMenu
+from prompt_smart_menu.helpers import InvalidArgError
+from prompt_smart_menu.input_parser import InputParser, KwargCast, NumberCast
+from prompt_smart_menu.tracing import Tracer
+
+import pytest
+
+
+def dummy(*args, **kwargs):
+    return (args, kwargs)
+
+
+def report(year, *, fmt='txt'):
+    return (year, fmt)
+
+
+class RecordingTracer(Tracer):
+
+    def __init__(self):
+        self.events = []
+
+    def before(self, stage, info):
+        self.events.append(('before', stage))
+
+    def after(self, stage, info, error=None):
+        self.events.append(('after', stage, type(error).__name__
+                            if error else info.get('result')))
+
+    def stages(self, when='before'):
+        return [event[1] for event in self.events if event[0] == when]
+
+
+@pytest.fixture
+def menu():
+    config = [{'command': 'show',
+               'children': [{'command': 'ip', 'function': dummy}]},
+              {'command': 'report', 'function': report,
+               'validate_args': True}]
+    return PromptSmartMenu(config, parser=InputParser(KwargCast, NumberCast))
+
+
+class TestTracer:
+
+    def test_stages(self, menu):
+        tracer = RecordingTracer()
+        menu.set_tracer(tracer)
+        assert menu.run('show ip 1') == ((1,), {})
+
+        # Each of show, ip and the arguments is parsed, with two casts
+        assert tracer.stages() == ['command',
+                                   'parse', 'cast', 'cast',
+                                   'parse', 'cast', 'cast',
+                                   'parse', 'cast', 'cast',
+                                   'call']
+        assert tracer.events[-1] == ('after', 'command', ((1,), {}))
+        assert ('after', 'cast', 1) in tracer.events
+
+    def test_validate_stage(self, menu):
+        tracer = RecordingTracer()
+        menu.set_tracer(tracer)
+        assert menu.run('report 2020 --fmt=csv') == (2020, 'csv')
+        assert 'validate' in tracer.stages()
+
+    def test_error(self, menu):
+        tracer = RecordingTracer()
+        menu.set_tracer(tracer)
+        with pytest.raises(InvalidArgError):
+            menu.run('report')
+
+        assert ('after', 'validate', 'InvalidArgError') in tracer.events
+        assert tracer.events[-1] == ('after', 'command', 'InvalidArgError')
+        assert 'call' not in tracer.stages()
+
+    def test_sample_rate(self, menu):
+        tracer = RecordingTracer()
+        menu.set_tracer(tracer, sample_rate=0.0)
+        menu.run('show ip')
+        assert tracer.events == []
+
+    def test_disable(self, menu):
+        tracer = RecordingTracer()
+        menu.set_tracer(tracer)
+        menu.set_tracer(None)
+        menu.run('show ip')
+        assert tracer.events == []
+
+    def test_compiled_and_run_many(self, menu):
+        tracer = RecordingTracer()
+        menu.compile()
+        menu.set_tracer(tracer)
+        results = list(menu.run_many(['show ip 1', 'show nothing']))
+
+        assert results[0] == (True, ((1,), {}))
+        assert not results[1][0]
+        assert tracer.stages().count('command') == 2
+
+    def test_metrics_recorded(self, menu):
+        metrics = menu.enable_metrics()
+        menu.set_tracer(RecordingTracer())
+        menu.run('show ip')
+        assert metrics.snapshot()['show ip']['calls'] == 1
+
+    def test_thread_execution(self):
+        tracer = RecordingTracer()
+        config = [{'command': 'test', 'function': dummy,
+                   'execution': 'thread'}]
+        with PromptSmartMenu(config) as psm:
+            psm.set_tracer(tracer)
+            psm.run('test').result()
+        assert ('after', 'call', ((), {})) in tracer.events
+
+    def test_bad_tracer_raises(self, menu):
+        with pytest.raises(TypeError):
+            menu.set_tracer(object())
+        with pytest.raises(ValueError):
+            menu.set_tracer(Tracer(), sample_rate=2)